@@ -0,0 +1,40 @@
+"""token expires tz
+
+Revision ID: 5f0c2a9d7e41
+Revises: 8cf6cf1f96b7
+Create Date: 2026-10-15 23:40:12.318204
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5f0c2a9d7e41"
+down_revision = "8cf6cf1f96b7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Существующие значения записаны как naive UTC
+    op.alter_column(
+        "users",
+        "yandex_token_expires",
+        existing_type=sa.DateTime(),
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=True,
+        postgresql_using="yandex_token_expires AT TIME ZONE 'UTC'",
+    )
+
+
+def downgrade():
+    op.alter_column(
+        "users",
+        "yandex_token_expires",
+        existing_type=sa.DateTime(timezone=True),
+        type_=sa.DateTime(),
+        existing_nullable=True,
+        postgresql_using="yandex_token_expires AT TIME ZONE 'UTC'",
+    )
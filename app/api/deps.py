@@ -1,7 +1,7 @@
 from typing import Annotated, AsyncGenerator
 
 from fastapi import Depends, HTTPException, Request, status
-from jose import JWTError
+from jwt import PyJWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import AsyncSessionLocal
@@ -11,7 +11,7 @@ from app.database.repositories.user import UserRepository
 from app.services.report_service import ReportService
 from app.services.token_manager import verify_token
 from app.services.yandex import YandexService
-from app.services.yandex_gpt_service import YandexGPTMLService
+from app.services.yandex_gpt_service import YandexGPTMLService, get_yandex_gpt_service
 from app.services.yandex_tracker import YandexTrackerService
 
 
@@ -29,26 +29,28 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 DB = Annotated[AsyncSession, Depends(get_db)]
 
 
-async def get_current_user_id(request: Request) -> int:
-    """
-    Dependency для аутентификации пользователя через JWT токен.
-    Возвращает user_id из токена.
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+async def get_current_user_id(request: Request) -> int:
+    """
+    Dependency для аутентификации пользователя через JWT токен.
+    Возвращает user_id из токена.
+    """
     try:
         token = request.headers["authorization"].replace("Bearer ", "")
         payload = verify_token(token)
         user_id = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
         return int(user_id)
-    except (KeyError, JWTError):
-        raise credentials_exception
+    except (KeyError, PyJWTError):
+        raise _credentials_exception()
 
 
 CurrentUserId = Annotated[int, Depends(get_current_user_id)]
@@ -82,15 +84,17 @@ def get_tracker_repo(db: DB):
 TrackerRepo = Annotated[TrackerRepository, Depends(get_tracker_repo)]
 
 
-def get_tracker_service(db: DB):
-    return YandexTrackerService(db)
+def get_tracker_service(db: DB, user_repo: UserRepo):
+    return YandexTrackerService(db, user_repo)
 
 
 TrackerSvc = Annotated[YandexTrackerService, Depends(get_tracker_service)]
 
 
-def get_gpt_service():
-    return YandexGPTMLService()
+async def get_gpt_service():
+    # async: FastAPI не отправляет синхронную зависимость в пул потоков ради
+    # возврата общего экземпляра
+    return get_yandex_gpt_service()
 
 
 GPTSvc = Annotated[YandexGPTMLService, Depends(get_gpt_service)]
@@ -112,8 +116,8 @@ def get_report_service(
 ReportSvc = Annotated[ReportService, Depends(get_report_service)]
 
 
-def get_yandex_service(db: DB):
-    return YandexService(db)
+def get_yandex_service(db: DB, user_repo: UserRepo):
+    return YandexService(db, user_repo)
 
 
 YandexSvc = Annotated[YandexService, Depends(get_yandex_service)]
@@ -1,17 +1,13 @@
 import logging
 
 from fastapi import APIRouter, HTTPException, Request, status
-from jose import JWTError
-from jose.exceptions import ExpiredSignatureError
+from jwt import ExpiredSignatureError, PyJWTError
 
 from app.api.deps import YandexSvc
 from app.schemas.auth import YandexRefreshRequest, YandexTokenResponse
-from app.services.token_manager import (
-    generate_access_jwt,
-    generate_refresh_jwt,
-    verify_token,
-)
-from app.services.yandex import YandexService
+from app.services.token_manager import generate_jwt_pair, verify_token
+from app.services.yandex import get_auth_url
+from app.utils.errors import translate_errors
 
 log = logging.getLogger(__name__)
 
@@ -35,16 +31,7 @@ async def login_yandex():
     Возвращает:
     - Объект с URL для перенаправления на страницу авторизации Яндекс
     """
-    try:
-        # Вызываем статический метод напрямую из класса
-        auth_data = await YandexService.get_auth_url()
-        return auth_data
-    except Exception as e:
-        log.error(f"Yandex login error: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to initiate Yandex OAuth",
-        )
+    return get_auth_url()
 
 
 @router.get(
@@ -58,6 +45,12 @@ async def login_yandex():
         500: {"description": "Ошибка сервера"},
     },
 )
+@translate_errors(
+    "Callback processing failed",
+    "Failed to process OAuth callback",
+    exc_info=True,
+    status_code=status.HTTP_400_BAD_REQUEST,
+)
 async def auth_callback(
     code: str,
     request: Request,
@@ -72,25 +65,13 @@ async def auth_callback(
     Возвращает:
     - Объект с access и refresh токенами
     """
-    try:
-        log.debug(f"Processing callback with code: {code}")
+    client_ip = request.client.host if request.client else "unknown"
+    user_agent = request.headers.get("user-agent", "unknown")
+    log.debug("Request from IP: %s, UA: %s", client_ip, user_agent)
 
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        log.debug(f"Request from IP: {client_ip}, UA: {user_agent}")
+    tokens = await auth_service.handle_callback(code)
 
-        tokens = await auth_service.handle_callback(code)
-
-        return {"status": "success", "tokens": tokens}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        log.error(f"Callback processing failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to process OAuth callback",
-        )
+    return {"status": "success", "tokens": tokens}
 
 
 @router.post(
@@ -106,6 +87,11 @@ async def auth_callback(
         500: {"description": "Ошибка сервера"},
     },
 )
+@translate_errors(
+    "Token refresh failed",
+    "Internal server error during token refresh",
+    exc_info=True,
+)
 async def refresh_token(request: YandexRefreshRequest):
     """
     Обновляет access token с помощью valid refresh token.
@@ -117,7 +103,6 @@ async def refresh_token(request: YandexRefreshRequest):
     - Новые access и refresh токены
     """
     try:
-        log.debug(f"refresh_token {request.refresh_token}")
         payload = verify_token(request.refresh_token)
 
         user_id = payload.get("sub")
@@ -129,8 +114,7 @@ async def refresh_token(request: YandexRefreshRequest):
                 detail="Invalid token payload: missing required claims",
             )
 
-        access_token = generate_access_jwt(user_id, yandex_id)
-        refresh_token = generate_refresh_jwt(user_id, yandex_id)
+        access_token, refresh_token = await generate_jwt_pair(user_id, yandex_id)
 
         return {"access_token": access_token, "refresh_token": refresh_token}
 
@@ -139,14 +123,8 @@ async def refresh_token(request: YandexRefreshRequest):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token has expired. Please log in again.",
         )
-    except JWTError as e:
+    except PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Invalid refresh token: {str(e)}",
         )
-    except Exception as e:
-        log.error(f"Token refresh failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error during token refresh",
-        )
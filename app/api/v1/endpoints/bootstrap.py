@@ -0,0 +1,61 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.api.deps import CurrentUserId, TrackerSvc, UserRepo
+from app.api.v1.endpoints.profile import build_user_response
+from app.database import get_session_lock
+from app.schemas.bootstrap import BootstrapResponse
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=BootstrapResponse,
+    summary="Получить стартовые данные для интерфейса",
+    response_description="Профиль пользователя, спринты и пользователи трекера",
+    responses={
+        200: {"description": "Стартовые данные успешно получены"},
+        404: {"description": "Пользователь не найден"},
+        500: {"description": "Ошибка сервера"},
+    },
+)
+async def get_bootstrap(
+    current_user_id: CurrentUserId,
+    user_repo: UserRepo,
+    tracker_service: TrackerSvc,
+):
+    """
+    Возвращает все данные, необходимые интерфейсу при первой загрузке.
+
+    Вместо отдельных запросов к профилю, спринтам и пользователям трекера
+    клиент делает один запрос. Спринты и пользователи запрашиваются
+    у Яндекс Трекера параллельно.
+
+    Возвращает:
+    - Профиль пользователя с трекерами
+    - Список спринтов и пользователей текущего трекера (пустые, если трекер не выбран)
+    """
+    # Запросы к трекеру стартуют сразу и идут параллельно с чтением профиля
+    # из БД; если трекер не выбран, их результат отбрасывается
+    dashboard = asyncio.ensure_future(tracker_service.get_dashboard(current_user_id))
+    try:
+        async with get_session_lock(user_repo.session):
+            profile = await build_user_response(user_repo, current_user_id)
+    except BaseException:
+        dashboard.cancel()
+        raise
+
+    if not profile or not profile.current_tracker:
+        # Без текущего трекера запрос завершается ошибкой сразу после чтения
+        # пользователя из БД; дожидаемся его, чтобы не отменять посреди запроса
+        # к общей сессии, и отбрасываем результат
+        await asyncio.gather(dashboard, return_exceptions=True)
+        if not profile:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+        return BootstrapResponse(profile=profile)
+
+    return BootstrapResponse(profile=profile, **await dashboard)
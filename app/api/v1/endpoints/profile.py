@@ -1,46 +1,25 @@
 from fastapi import APIRouter, HTTPException, status
 
 from app.api.deps import CurrentUserId, UserRepo
+from app.database.repositories.user import UserRepository
 from app.schemas.tracker import TrackerResponse
 from app.schemas.user import UserResponse
 
 router = APIRouter()
 
 
-@router.get(
-    "/me",
-    response_model=UserResponse,
-    summary="Получить профиль текущего пользователя",
-    response_description="Информация о профиле пользователя и связанных трекерах",
-    responses={
-        200: {"description": "Профиль пользователя успешно получен"},
-        404: {"description": "Пользователь не найден"},
-        500: {"description": "Ошибка сервера"},
-    },
-)
-async def get_my_profile(
-    current_user_id: CurrentUserId,
-    user_repo: UserRepo,
-):
+async def build_user_response(
+    user_repo: UserRepository, user_id: int
+) -> UserResponse | None:
     """
-    Получает профиль текущего авторизованного пользователя со всей информацией.
-
-    Функция извлекает полную информацию о текущем пользователе, включая:
-    - Основные данные пользователя (ID, логин, email, имя и т.д.)
-    - Список всех трекеров, к которым имеет доступ пользователь, вместе с ролями
-    - Информацию о текущем активном трекере пользователя
-
-    Возвращает:
-    - Полный профиль пользователя с информацией о всех связанных трекерах и ролях
+    Собирает профиль пользователя со всеми связанными трекерами и текущим трекером.
+    Возвращает None, если пользователь не найден.
     """
-    user_db = await user_repo.get_by_id_with_all_trackers(current_user_id)
-
+    user_db = await user_repo.get_by_id_with_all_trackers(user_id)
     if not user_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
+        return None
 
-    current_tracker_result = await user_repo.get_user_current_tracker(current_user_id)
+    current_tracker_result = await user_repo.get_user_current_tracker(user_id)
 
     all_trackers_response = []
     if user_db.tracker_associations:
@@ -71,3 +50,38 @@ async def get_my_profile(
     )
 
     return user_response
+
+
+@router.get(
+    "/me",
+    response_model=UserResponse,
+    summary="Получить профиль текущего пользователя",
+    response_description="Информация о профиле пользователя и связанных трекерах",
+    responses={
+        200: {"description": "Профиль пользователя успешно получен"},
+        404: {"description": "Пользователь не найден"},
+        500: {"description": "Ошибка сервера"},
+    },
+)
+async def get_my_profile(
+    current_user_id: CurrentUserId,
+    user_repo: UserRepo,
+):
+    """
+    Получает профиль текущего авторизованного пользователя со всей информацией.
+
+    Функция извлекает полную информацию о текущем пользователе, включая:
+    - Основные данные пользователя (ID, логин, email, имя и т.д.)
+    - Список всех трекеров, к которым имеет доступ пользователь, вместе с ролями
+    - Информацию о текущем активном трекере пользователя
+
+    Возвращает:
+    - Полный профиль пользователя с информацией о всех связанных трекерах и ролях
+    """
+    user_response = await build_user_response(user_repo, current_user_id)
+    if not user_response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    return user_response
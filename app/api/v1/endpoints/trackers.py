@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException, status
 
 from app.api.deps import CurrentUserId, TrackerRepo, UserRepo
 from app.schemas.tracker import TrackerCreate, TrackerResponse
+from app.services.yandex_tracker import invalidate_cached_user
 
 router = APIRouter()
 
@@ -97,6 +98,7 @@ async def create_tracker(
         tracker_id=new_tracker.id,
         role="manager",  # Set role to manager
     )
+    invalidate_cached_user(current_user_id)
     return new_tracker
 
 
@@ -179,6 +181,7 @@ async def set_current_tracker(
         user_id=current_user_id,
         tracker_id=tracker_db.id,
     )
+    invalidate_cached_user(current_user_id)
 
     # Get the role for this tracker
     role = await user_repo.get_user_role_for_tracker(current_user_id, tracker_db.id)
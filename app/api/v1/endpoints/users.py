@@ -7,6 +7,7 @@ from app.api.deps import CurrentUserId, TrackerSvc, UserRepo
 from app.database.user import User
 from app.database.user_tracker_role import RoleEnum
 from app.schemas.user import RoleUpdateRequest, UserBaseResponse
+from app.services.yandex_tracker import invalidate_cached_user
 
 router = APIRouter()
 
@@ -16,6 +17,7 @@ log = logging.getLogger(__name__)
 @router.get(
     "",
     response_model=List[UserBaseResponse],
+    response_model_exclude_none=True,
     summary="Получить список всех пользователей",
     response_description="Список пользователей",
     responses={
@@ -42,15 +44,8 @@ async def get_users(
     """
     log.debug("Fetching all users")
 
-    # Get users from Yandex Tracker
-    tracker_users = await tracker_service.get_users(current_user_id)
-
-    # Filter out robot users
-    real_users = [
-        user
-        for user in tracker_users
-        if not user.get("display", "").lower().startswith("робот")
-    ]
+    # Get users from Yandex Tracker (robot users are filtered by the service)
+    real_users = await tracker_service.get_users(current_user_id)
 
     # Get current tracker for the current user
     current_tracker, role = await user_repo.get_user_current_tracker(current_user_id)
@@ -111,29 +106,16 @@ async def get_users(
                     await user_repo.set_current_tracker(
                         existing_user.id, current_tracker.id, "employee"
                     )
+                    invalidate_cached_user(existing_user.id)
                     log.info(
                         f"Assigned employee role to user: {existing_user.id} ({existing_user.display_name})"
                     )
         except Exception as e:
             log.error(f"Error processing user {tracker_user.get('display')}: {str(e)}")
 
-    # Get all users from database
-    users = await user_repo.get_all_users()
-
-    # Convert users to response model
-    user_responses = [
-        UserBaseResponse(
-            id=user.id,
-            login=user.login,
-            email=user.email,
-            display_name=user.display_name,
-            first_name=user.first_name,
-            last_name=user.last_name,
-        )
-        for user in users
-    ]
-
-    return user_responses
+    # Get all users from database; FastAPI converts the ORM objects through
+    # the response model (from_attributes) in a single validation pass
+    return await user_repo.get_all_users()
 
 
 @router.post(
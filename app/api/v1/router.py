@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, status
 from sqlalchemy import text
 
 from app.api.deps import DB
-from app.api.v1.endpoints import auth, profile, reports, trackers, users
+from app.api.v1.endpoints import auth, bootstrap, profile, reports, trackers, users
 
 api_router = APIRouter()
 
@@ -12,6 +12,7 @@ api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
 api_router.include_router(trackers.router, prefix="/trackers", tags=["trackers"])
 api_router.include_router(profile.router, prefix="/profile", tags=["profile"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(bootstrap.router, prefix="/bootstrap", tags=["bootstrap"])
 
 
 @api_router.get("/health", tags=["health"])
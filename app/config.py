@@ -1,6 +1,6 @@
 from typing import List
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -30,9 +30,15 @@ class Settings(BaseSettings):
     yc_gpt_version: str = "rc"
     yc_gpt_temperature: float = 0.5
     yc_gpt_max_tokens: int = 1000
+    # Максимум одновременных запросов к Yandex GPT
+    yc_max_concurrency: int = 8
 
-    class Config:
-        env_file = ".env"
+    # Ограничения исходящих запросов к API Яндекса
+    yandex_max_concurrency: int = 32
+    yandex_requests_per_second: float = 50.0
+    yandex_retry_attempts: int = 3
+
+    model_config = SettingsConfigDict(env_file=".env")
 
 
 settings = Settings()
@@ -1,3 +1,5 @@
+import asyncio
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -17,5 +19,14 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+
+def get_session_lock(session: AsyncSession) -> asyncio.Lock:
+    """
+    Блокировка сессии: AsyncSession не допускает конкурентных запросов,
+    поэтому задачи, запущенные через asyncio.gather, обращаются к БД под ней
+    """
+    return session.info.setdefault("lock", asyncio.Lock())
+
+
 # Примечание: функция get_db определена в app.api.deps
 # Все зависимости должны импортироваться из app.api.deps
@@ -1,8 +1,12 @@
-from sqlalchemy import select
+from sqlalchemy import and_, func, select, true
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.database.models.report import SprintReportDB
 from app.database.models.team_report import TeamSprintReportDB
+from app.database.tracker import Tracker
+from app.database.user_tracker_role import UserTrackerRole
 
 
 class ReportRepository:
@@ -76,6 +80,84 @@ class ReportRepository:
         )
         return q.scalars().first()
 
+    async def get_report_bundle(
+        self, user_id: int, sprint_id: int
+    ) -> tuple[Tracker, SprintReportDB | None, SprintReportDB | None] | None:
+        """
+        Текущий трекер пользователя, его отчёт за спринт и предыдущий отчёт
+        одним запросом. None, если у пользователя нет текущего трекера
+        """
+        current = aliased(SprintReportDB)
+        prev_q = (
+            select(SprintReportDB)
+            .where(SprintReportDB.user_id == UserTrackerRole.user_id)
+            .where(SprintReportDB.tracker_id == UserTrackerRole.tracker_id)
+            .where(SprintReportDB.sprint_start_date < current.sprint_start_date)
+            .order_by(SprintReportDB.sprint_start_date.desc())
+            .limit(1)
+            .lateral()
+        )
+        previous = aliased(SprintReportDB, prev_q)
+        q = await self.session.execute(
+            select(Tracker, current, previous)
+            .join(UserTrackerRole, UserTrackerRole.tracker_id == Tracker.id)
+            .outerjoin(
+                current,
+                and_(
+                    current.user_id == UserTrackerRole.user_id,
+                    current.tracker_id == UserTrackerRole.tracker_id,
+                    current.sprint_id == sprint_id,
+                ),
+            )
+            .outerjoin(previous, true())
+            .where(
+                UserTrackerRole.user_id == user_id, UserTrackerRole.is_current.is_(True)
+            )
+        )
+        row = q.first()
+        if not row:
+            return None
+        return tuple(row)
+
+    async def get_sprint_reports_by_users(
+        self, user_ids: list[int], tracker_id: int, sprint_id: int
+    ) -> dict[int, SprintReportDB]:
+        """Отчёты за спринт для нескольких пользователей одним запросом"""
+        if not user_ids:
+            return {}
+        q = await self.session.execute(
+            select(SprintReportDB)
+            .where(SprintReportDB.user_id.in_(user_ids))
+            .where(SprintReportDB.tracker_id == tracker_id)
+            .where(SprintReportDB.sprint_id == sprint_id)
+        )
+        return {report.user_id: report for report in q.scalars()}
+
+    async def get_previous_sprint_reports_by_users(
+        self, user_ids: list[int], tracker_id: int, sprint_start_date
+    ) -> dict[int, SprintReportDB]:
+        """Последний отчёт до даты начала спринта для каждого из пользователей"""
+        if not user_ids:
+            return {}
+        ranked = (
+            select(
+                SprintReportDB,
+                func.row_number()
+                .over(
+                    partition_by=SprintReportDB.user_id,
+                    order_by=SprintReportDB.sprint_start_date.desc(),
+                )
+                .label("rn"),
+            )
+            .where(SprintReportDB.user_id.in_(user_ids))
+            .where(SprintReportDB.tracker_id == tracker_id)
+            .where(SprintReportDB.sprint_start_date < sprint_start_date)
+            .subquery()
+        )
+        report = aliased(SprintReportDB, ranked)
+        q = await self.session.execute(select(report).where(ranked.c.rn == 1))
+        return {r.user_id: r for r in q.scalars()}
+
 
 class TeamReportRepository:
     def __init__(self, session: AsyncSession):
@@ -97,25 +179,23 @@ class TeamReportRepository:
         sprint_end_date,
         employee_stats,
     ):
-        obj = await self.session.execute(
-            select(TeamSprintReportDB)
-            .where(TeamSprintReportDB.tracker_id == tracker_id)
-            .where(TeamSprintReportDB.sprint_id == sprint_id)
+        # Один INSERT ... ON CONFLICT вместо SELECT + INSERT/UPDATE
+        stmt = insert(TeamSprintReportDB).values(
+            tracker_id=tracker_id,
+            sprint_id=sprint_id,
+            sprint_start_date=sprint_start_date,
+            sprint_end_date=sprint_end_date,
+            employee_stats=employee_stats,
         )
-        report = obj.scalar_one_or_none()
-        if not report:
-            report = TeamSprintReportDB(
-                tracker_id=tracker_id,
-                sprint_id=sprint_id,
-                sprint_start_date=sprint_start_date,
-                sprint_end_date=sprint_end_date,
-                employee_stats=employee_stats,
-            )
-            self.session.add(report)
-        else:
-            report.sprint_start_date = sprint_start_date
-            report.sprint_end_date = sprint_end_date
-            report.employee_stats = employee_stats
+        stmt = stmt.on_conflict_do_update(
+            constraint="_tracker_sprint_uc",
+            set_={
+                "sprint_start_date": stmt.excluded.sprint_start_date,
+                "sprint_end_date": stmt.excluded.sprint_end_date,
+                "employee_stats": stmt.excluded.employee_stats,
+            },
+        ).returning(TeamSprintReportDB)
+        q = await self.session.execute(stmt)
+        report = q.scalar_one()
         await self.session.commit()
-        await self.session.refresh(report)
         return report
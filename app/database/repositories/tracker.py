@@ -1,10 +1,12 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..tracker import Tracker
 
+_UTC = timezone.utc
+
 
 class TrackerRepository:
     def __init__(self, session: AsyncSession):
@@ -58,7 +60,7 @@ class TrackerRepository:
                 tracker_type="yandex",
                 yandex_cloud_id=cloud_id,
                 yandex_org_id=org_id,
-                created_at=datetime.utcnow(),
+                created_at=datetime.now(_UTC).replace(tzinfo=None),
             )
             self.session.add(tracker)
         else:
@@ -66,7 +68,7 @@ class TrackerRepository:
             tracker.name = name
             tracker.yandex_cloud_id = cloud_id or tracker.yandex_cloud_id
             tracker.yandex_org_id = org_id or tracker.yandex_org_id
-            tracker.updated_at = datetime.utcnow()
+            tracker.updated_at = datetime.now(_UTC).replace(tzinfo=None)
 
         await self.session.commit()
         await self.session.refresh(tracker)
@@ -1,7 +1,7 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select, update
+from sqlalchemy import and_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload  # Ensure both are imported
 
@@ -13,6 +13,8 @@ from ...schemas.user import YandexUserInfo
 from ..user import User
 from ..user_tracker_role import RoleEnum, UserTrackerRole  # Import RoleEnum
 
+_UTC = timezone.utc
+
 log = logging.getLogger(__name__)
 
 
@@ -22,10 +24,11 @@ class UserRepository:
 
     async def get_by_id(self, user_id: int) -> User | None:
         """Получить пользователя по ID"""
-        log.debug(f"userid {(user_id)}")
-        result = await self.session.execute(select(User).where(User.id == user_id))
-        log.debug(f"result {result}")
-        return result.scalar_one_or_none()
+        log.debug("userid %s", user_id)
+        # session.get сначала смотрит identity map: пользователь, уже
+        # загруженный в этом запросе, возвращается без SELECT. ORM-update
+        # в этой же сессии синхронизирует загруженный объект
+        return await self.session.get(User, user_id)
 
     async def get_by_id_with_all_trackers(self, user_id: int) -> User | None:
         """Получить пользователя по ID со всеми связанными трекерами"""
@@ -40,6 +43,28 @@ class UserRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_by_id_with_current_tracker(
+        self, user_id: int
+    ) -> tuple[User, Tracker | None] | None:
+        """Получить пользователя и его текущий трекер одним запросом"""
+        result = await self.session.execute(
+            select(User, Tracker)
+            .outerjoin(
+                UserTrackerRole,
+                and_(
+                    UserTrackerRole.user_id == User.id,
+                    UserTrackerRole.is_current.is_(True),
+                ),
+            )
+            .outerjoin(Tracker, Tracker.id == UserTrackerRole.tracker_id)
+            .where(User.id == user_id)
+        )
+        row = result.first()
+        if not row:
+            return None
+        user, tracker = row
+        return user, tracker
+
     async def get_user_current_tracker(
         self, user_id: int
     ) -> tuple[Tracker, str] | None:
@@ -75,21 +100,23 @@ class UserRepository:
     ) -> User:
         """Создает или обновляет пользователя из данных Яндекса"""
         user = await self.get_by_yandex_id(user_info.id)
+        # Срок токена — aware UTC; остальные колонки без часового пояса
+        # хранят naive UTC
+        now_utc = datetime.now(_UTC)
+        now = now_utc.replace(tzinfo=None)
 
         if not user:
             user = User(
                 email=user_info.default_email,
                 yandex_id=user_info.id,
                 is_verified=True,
-                created_at=datetime.utcnow(),
+                created_at=now,
             )
             self.session.add(user)
 
         user.yandex_token = token_data.access_token
         user.yandex_refresh_token = token_data.refresh_token
-        user.yandex_token_expires = datetime.utcnow() + timedelta(
-            seconds=token_data.expires_in
-        )
+        user.yandex_token_expires = now_utc + timedelta(seconds=token_data.expires_in)
         user.first_name = user_info.first_name
         user.last_name = user_info.last_name
         user.display_name = user_info.display_name
@@ -97,11 +124,12 @@ class UserRepository:
         user.is_active = True
         user.is_superuser = False
         user.is_verified = True
-        user.last_login = datetime.utcnow()
-        user.updated_at = datetime.utcnow()
+        user.last_login = now
+        user.updated_at = now
 
+        # Все поля заданы явно, а сессия не сбрасывает их при commit,
+        # поэтому повторное чтение строки (refresh) не требуется
         await self.session.commit()
-        await self.session.refresh(user)
         return user
 
     async def update_yandex_tokens(
@@ -112,7 +140,7 @@ class UserRepository:
         expires_in: int,
     ) -> User | None:
         """Обновить Yandex-токены пользователя"""
-        expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
+        expires_at = datetime.now(_UTC) + timedelta(seconds=expires_in)
         await self.session.execute(
             update(User)
             .where(User.id == user_id)
@@ -129,7 +157,7 @@ class UserRepository:
         user_info_dict = user_info.model_dump(
             exclude_none=True, exclude={"cloud_id", "org_id"}
         )
-        log.debug(f"user_info_dict {user_info_dict}")
+        log.debug("user_info_dict %s", user_info_dict)
         await self.session.execute(
             update(User).where(User.id == user_id).values(**user_info_dict)
         )
@@ -235,7 +263,7 @@ class UserRepository:
 
         if user_tracker_role:
             user_tracker_role.role = new_role
-            user_tracker_role.updated_at = datetime.utcnow()
+            user_tracker_role.updated_at = datetime.now(_UTC).replace(tzinfo=None)
             await self.session.commit()
             return user_tracker_role
         return None
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 from pydantic import ValidationError, validate_email
 from sqlalchemy import Boolean, Column, DateTime, Integer, String, func
@@ -27,7 +27,8 @@ class User(Base):
     # Интеграция с Яндекс OAuth
     yandex_id = Column(Integer, unique=True, nullable=False)
     yandex_token = Column(String(500), nullable=True)
-    yandex_token_expires = Column(DateTime, nullable=True)
+    # Срок токена хранится с часовым поясом (UTC)
+    yandex_token_expires = Column(DateTime(timezone=True), nullable=True)
     yandex_refresh_token = Column(String(500), nullable=True)
 
     # Интеграция с Яндекс.Трекером
@@ -69,7 +70,7 @@ class User(Base):
         """Проверяет истек ли срок действия Яндекс-токена"""
         if not self.yandex_token_expires:
             return True
-        return datetime.utcnow() > self.yandex_token_expires
+        return datetime.now(timezone.utc) > self.yandex_token_expires
 
     def __repr__(self):
         return f"<User(id={self.id}, yandex_id={self.yandex_id})>"
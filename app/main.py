@@ -1,11 +1,19 @@
+import json
+from contextlib import asynccontextmanager
 from logging.config import dictConfig
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
 
 from app.api.v1.router import api_router
 from app.config import settings
+from app.services.http_client import (
+    TRACKER_BASE_URL,
+    close_http_client,
+    get_http_client,
+)
 
 # Конфигурация логирования
 dictConfig(
@@ -52,12 +60,25 @@ dictConfig(
     }
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Создаём клиенты (пулы соединений, SSL-контекст) при старте,
+    # чтобы первый запрос к API Яндекса не платил за его инициализацию
+    get_http_client()
+    get_http_client(TRACKER_BASE_URL)
+    yield
+    # Закрываем пулы соединений к API Яндекса
+    await close_http_client()
+
+
 app = FastAPI(
     title=settings.project_name,
     description=f"API Backend for {settings.project_name}",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 
@@ -107,11 +128,27 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.api_v1_str)
 
 
-@app.get("/")
-async def root():
-    return {
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    # Единый ответ на непредвиденные ошибки вместо try/except в каждом
+    # сервисном методе; трейсбек пишет сервер (uvicorn)
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "Внутренняя ошибка сервера"},
+    )
+
+
+# Ответ корневого эндпоинта не меняется, поэтому кодируется один раз при старте
+ROOT_RESPONSE_BODY = json.dumps(
+    {
         "message": settings.project_name,
         "documentation": "/docs",
         "version": "1.0.0",
         "api_version": "v1",
     }
+).encode()
+
+
+@app.get("/")
+async def root():
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
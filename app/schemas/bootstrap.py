@@ -0,0 +1,12 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from app.schemas.user import UserResponse
+from app.schemas.yandex_tracker import Sprint
+
+
+class BootstrapResponse(BaseModel):
+    profile: UserResponse
+    sprints: List[Sprint] = []
+    tracker_users: List[dict] = []
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Recommendation(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     title: str
     text: str
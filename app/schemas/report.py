@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class SprintStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     total_story_points: float
     total_tasks: float
     deadlines_missed: float
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class TrackerBase(BaseModel):
@@ -22,8 +22,7 @@ class TrackerResponse(TrackerBase):
     is_active: bool = True
     role: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TrackerUpdate(BaseModel):
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.schemas.tracker import TrackerResponse
 
@@ -16,6 +16,8 @@ class YandexUserInfo(BaseModel):
 
 
 class UserModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     self: str
     uid: int
     login: str
@@ -45,8 +47,7 @@ class UserBaseResponse(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserResponse(UserBaseResponse):
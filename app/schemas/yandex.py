@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class YandexIdInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: int
     login: str
     first_name: str
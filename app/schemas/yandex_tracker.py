@@ -1,27 +1,37 @@
 from datetime import date, datetime
 
-from pydantic import BaseModel, Field
+from pydantic import AliasPath, BaseModel, ConfigDict, Field
 
 
 class TaskStatus(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     key: str
     display: str
 
 
 class Task(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     key: str
     summary: str
     story_points: int | None = Field(alias="storyPoints", default=None)
     deadline: date | None = Field(format="%Y-%m-%d", default=None)
     resolved_at: datetime | None = Field(alias="resolvedAt", default=None)
+    # Списанное время по задаче (ISO 8601), трекер считает его по worklog
+    spent: str | None = None
     status: TaskStatus
 
 
 class Sprint(BaseModel):
+    # validation_alias: спринт валидируется прямо из ответа трекера, а наружу
+    # отдаётся с прежними именами полей
+    model_config = ConfigDict(frozen=True, populate_by_name=True)
+
     id: int
     name: str
-    board: str
-    start_date: date = Field(format="%Y-%m-%d")
-    end_date: date = Field(format="%Y-%m-%d")
+    board: str = Field(validation_alias=AliasPath("board", "display"))
+    start_date: date = Field(validation_alias="startDate", format="%Y-%m-%d")
+    end_date: date = Field(validation_alias="endDate", format="%Y-%m-%d")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+from fastapi import HTTPException
+
+from ..config import settings
+
+log = logging.getLogger(__name__)
+
+TRACKER_BASE_URL = "https://api.tracker.yandex.net"
+
+# Пулы соединений для исходящих запросов к API Яндекса: keep-alive
+# соединения переиспользуются между запросами вместо нового TCP/TLS
+# рукопожатия на каждый вызов. API трекера получает отдельный пул, чтобы
+# всплеск запросов к нему не вытеснял редкие соединения с OAuth
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=5,
+    max_connections=50,
+    keepalive_expiry=30,
+)
+TRACKER_HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=50,
+    max_connections=200,
+    keepalive_expiry=30,
+)
+HTTP_RETRIES = 2
+
+# Ответы, при которых запрос повторяется с экспоненциальной задержкой.
+# 429/503 — запрос не обработан, повтор безопасен для любого метода.
+# При 502/504 и сетевых ошибках Яндекс мог уже выполнить запрос, поэтому
+# они повторяются только для идемпотентных запросов: повтор POST обмена
+# кода или refresh token выполнил бы его дважды
+RETRY_STATUSES = {429, 503}
+IDEMPOTENT_RETRY_STATUSES = RETRY_STATUSES | {502, 504}
+IDEMPOTENT_METHODS = {"GET"}
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10.0
+
+# Клиенты по base_url ("" — общий клиент для OAuth и login.yandex.ru)
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+class TokenBucket:
+    """Ограничивает частоту запросов алгоритмом token bucket"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+_semaphore = asyncio.Semaphore(settings.yandex_max_concurrency)
+_bucket = TokenBucket(settings.yandex_requests_per_second)
+
+
+def get_http_client(base_url: str = "") -> httpx.AsyncClient:
+    """Возвращает HTTP-клиент для base_url, создавая его при первом обращении"""
+    client = _clients.get(base_url)
+    if client is None or client.is_closed:
+        limits = TRACKER_HTTP_LIMITS if base_url == TRACKER_BASE_URL else HTTP_LIMITS
+        client = _clients[base_url] = httpx.AsyncClient(
+            base_url=base_url,
+            # Общий таймаут для всех запросов: вызовы не передают свой
+            timeout=10.0,
+            # HTTP/2: параллельные запросы к одному хосту API мультиплексируются
+            # в одном соединении вместо отдельного сокета на каждый
+            transport=httpx.AsyncHTTPTransport(
+                limits=limits, retries=HTTP_RETRIES, http2=True
+            ),
+        )
+    return client
+
+
+async def close_http_client() -> None:
+    """Закрывает HTTP-клиенты при остановке приложения"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def error_for_status(
+    response: httpx.Response,
+    errors: dict[int, tuple[int, str]],
+    default: tuple[int, str],
+) -> HTTPException:
+    """
+    Ошибка для клиента по статусу ответа Яндекса: (статус, сообщение) из
+    таблицы. Retry-After Яндекса передаётся клиенту как есть
+    """
+    status_code, detail = errors.get(response.status_code, default)
+    retry_after = response.headers.get("Retry-After")
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": retry_after} if retry_after else None,
+    )
+
+
+def _retry_delay(response: httpx.Response | None, attempt: int) -> float:
+    """
+    Задержка перед повтором: Retry-After от Яндекса или экспоненциальная
+    со случайным разбросом, чтобы параллельные запросы не повторялись разом
+    """
+    retry_after = response.headers.get("Retry-After") if response else None
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = RETRY_BASE_DELAY * 2**attempt * random.uniform(0.5, 1.5)
+    return min(delay, RETRY_MAX_DELAY)
+
+
+async def send_request(
+    method: str,
+    url: str,
+    base_url: str = "",
+    idempotent: bool | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Выполняет запрос к API Яндекса через общий клиент.
+
+    Число одновременных запросов и их частота ограничены, чтобы не упираться
+    в лимиты Яндекса при всплесках нагрузки. Ответы 429/503 повторяются
+    с экспоненциальной задержкой (или по заголовку Retry-After); 502/504
+    и сетевые ошибки — только для идемпотентных запросов (по умолчанию GET,
+    POST только на чтение передаёт idempotent=True явно).
+    """
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    retry_statuses = IDEMPOTENT_RETRY_STATUSES if idempotent else RETRY_STATUSES
+    attempts = max(settings.yandex_retry_attempts, 1)
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        try:
+            async with _semaphore, _bucket:
+                response = await get_http_client(base_url).request(
+                    method, url, **kwargs
+                )
+        except httpx.TransportError as e:
+            if last_attempt or not idempotent:
+                raise
+            response, outcome = None, type(e).__name__
+        else:
+            if response.status_code not in retry_statuses or last_attempt:
+                return response
+            outcome = response.status_code
+        delay = _retry_delay(response, attempt)
+        log.warning(
+            f"Yandex API request {method} {url} failed ({outcome}), "
+            f"retrying in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
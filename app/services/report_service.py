@@ -1,11 +1,16 @@
+import asyncio
 import logging
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterable, List, Optional
 
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import get_session_lock
+from app.database.models.report import SprintReportDB
 from app.database.repositories.report import ReportRepository, TeamReportRepository
 from app.database.repositories.user import UserRepository
+from app.database.tracker import Tracker
 from app.database.user import User
 from app.schemas.report import SprintStats
 from app.schemas.sprint_report import SprintReport
@@ -14,12 +19,24 @@ from app.schemas.team_report import (
     MetricWithComparison,
     TeamSprintReport,
 )
-from app.schemas.yandex_tracker import Task
+from app.schemas.yandex_tracker import Sprint, Task
 from app.services.yandex_gpt_service import YandexGPTMLService
-from app.services.yandex_tracker import YandexTrackerService
+from app.services.yandex_tracker import YandexTrackerService, duration_hours
 
 log = logging.getLogger(__name__)
 
+# Максимум одновременно формируемых отчётов сотрудников в командном отчёте
+TEAM_REPORT_CONCURRENCY = 16
+
+# Оценка сотрудника, если LLM не вернула её в ответе
+DEFAULT_RATING = {
+    "rating": 3,
+    "rating_explanation": "Ошибка AI при оценке производительности",
+}
+
+# Сериализует весь список статистики команды одним вызовом pydantic-core
+EMPLOYEE_STATS_ADAPTER = TypeAdapter(List[EmployeeSprintStats])
+
 
 class ReportService:
     """
@@ -42,167 +59,204 @@ class ReportService:
         self.user_repo = user_repo
         self.report_repo = report_repo
         self.team_report_repo = team_report_repo
+        # Отчёты сотрудников формируются параллельно, а сессия БД общая
+        self._db_lock = get_session_lock(db)
+        # Текущий трекер пользователя в пределах одного запроса
+        self._tracker_cache: dict[int, tuple[Tracker, str] | None] = {}
+
+    async def _current_tracker(self, user_id: int) -> tuple[Tracker, str] | None:
+        """Текущий трекер и роль пользователя, с кэшированием на время запроса"""
+        if user_id not in self._tracker_cache:
+            async with self._db_lock:
+                self._tracker_cache[
+                    user_id
+                ] = await self.user_repo.get_user_current_tracker(user_id)
+        return self._tracker_cache[user_id]
 
     async def generate_sprint_report(
         self,
         user: User,
         sprint_id: int,
         current_user_id: int,
+        sprint: Optional[Sprint] = None,
     ) -> SprintReport:
         """
         Generate a comprehensive sprint report for an employee.
         Uses provided service instances.
+        An already fetched sprint can be passed to skip the Tracker lookup.
         """
 
-        sprint = await self.yandex_tracker_service.get_sprint(
-            sprint_id, current_user_id
-        )
-        if not sprint:
-            raise ValueError(f"Sprint with ID {sprint_id} not found.")
-
-        tracker_info = await self.user_repo.get_user_current_tracker(user.id)
-        if not tracker_info:
+        # Трекер, сохранённый отчёт и предыдущий отчёт приходят одним запросом;
+        # если отчёт уже есть, к API трекера не обращаемся
+        async with self._db_lock:
+            bundle = await self.report_repo.get_report_bundle(user.id, sprint_id)
+        if not bundle:
             raise ValueError("Не удалось определить tracker_id для пользователя")
-        tracker, _ = tracker_info
-        tracker_id = tracker.id
+        tracker, existing_report, prev_report = bundle
+        if existing_report:
+            return self._build_stored_sprint_report(user, existing_report, prev_report)
 
-        tasks = await self.yandex_tracker_service.get_sprint_tasks(
-            sprint_id, current_user_id, user.login
-        )
-        sprint_stats = await self._process_tasks(tasks, current_user_id)
+        if sprint is None:
+            sprint = await self.yandex_tracker_service.get_sprint(
+                sprint_id, current_user_id
+            )
+        if not sprint:
+            raise ValueError(f"Sprint with ID {sprint_id} not found.")
 
-        existing_report = await self.report_repo.get_sprint_report_by_id(
-            user.id, tracker_id, sprint_id
-        )
-        if existing_report:
+        async with self._db_lock:
             prev_report = await self.report_repo.get_previous_sprint_report(
-                user.id, tracker_id, existing_report.sprint_start_date
-            )
-            prev_stats = None
-            if prev_report:
-                prev_stats = SprintStats(
-                    total_story_points=prev_report.story_points_closed,
-                    total_tasks=prev_report.tasks_completed,
-                    deadlines_missed=prev_report.deadlines_missed,
-                    average_completion_time=prev_report.average_task_completion_time,
-                )
-            return SprintReport(
-                user_id=existing_report.user_id,
-                employee_name=user.display_name,
-                sprint_name=existing_report.sprint_name,
-                sprint_start_date=existing_report.sprint_start_date,
-                sprint_end_date=existing_report.sprint_end_date,
-                story_points_closed=self._create_metric_comparison(
-                    existing_report.story_points_closed,
-                    prev_stats.total_story_points if prev_stats else None,
-                ),
-                tasks_completed=self._create_metric_comparison(
-                    existing_report.tasks_completed,
-                    prev_stats.total_tasks if prev_stats else None,
-                ),
-                deadlines_missed=self._create_metric_comparison(
-                    existing_report.deadlines_missed,
-                    prev_stats.deadlines_missed if prev_stats else None,
-                ),
-                average_task_completion_time=self._create_metric_comparison(
-                    existing_report.average_task_completion_time,
-                    prev_stats.average_completion_time if prev_stats else None,
-                ),
-                activity_analysis=existing_report.activity_analysis,
-                recommendations=existing_report.recommendations,
+                user.id, tracker.id, sprint.start_date
             )
 
-        prev_report = await self.report_repo.get_previous_sprint_report(
-            user.id, tracker_id, sprint.start_date
-        )
-        prev_stats = None
-        if prev_report:
-            prev_stats = SprintStats(
-                total_story_points=prev_report.story_points_closed,
-                total_tasks=prev_report.tasks_completed,
-                deadlines_missed=prev_report.deadlines_missed,
-                average_completion_time=prev_report.average_task_completion_time,
-            )
-        story_points_closed = self._create_metric_comparison(
-            sprint_stats.total_story_points,
-            prev_stats.total_story_points if prev_stats else None,
-        )
-        tasks_completed = self._create_metric_comparison(
-            sprint_stats.total_tasks, prev_stats.total_tasks if prev_stats else None
-        )
-        deadlines_missed = self._create_metric_comparison(
-            sprint_stats.deadlines_missed,
-            prev_stats.deadlines_missed if prev_stats else None,
-        )
-        average_task_completion_time = self._create_metric_comparison(
-            sprint_stats.average_completion_time,
-            prev_stats.average_completion_time if prev_stats else None,
+        return await self._generate_sprint_report_inner(
+            user, sprint, tracker.id, current_user_id, None, prev_report
         )
 
-        try:
-            activity_analysis = await self.yandex_gpt_service.analyze_employee_activity(
-                tasks, sprint_stats
-            )
-            recommendations = (
-                await self.yandex_gpt_service.generate_employee_recommendations(
-                    sprint_stats
-                )
-            )
-        except Exception as e:
-            log.error(f"LLM error: {e}")
-            raise
-
-        await self.report_repo.save_or_update_sprint_report(
-            user_id=user.id,
-            tracker_id=tracker_id,
-            sprint_id=sprint_id,
-            sprint_name=sprint.name,
-            sprint_start_date=sprint.start_date,
-            sprint_end_date=sprint.end_date,
-            story_points_closed=story_points_closed,
-            tasks_completed=tasks_completed,
-            deadlines_missed=deadlines_missed,
-            average_task_completion_time=average_task_completion_time,
-            activity_analysis=activity_analysis,
-            recommendations=recommendations,
+    def _build_stored_sprint_report(
+        self,
+        user: User,
+        existing_report: SprintReportDB,
+        prev_report: Optional[SprintReportDB],
+    ) -> SprintReport:
+        """
+        Build the employee sprint report from an already saved report.
+        """
+        return self._build_sprint_report(
+            user,
+            existing_report.sprint_name,
+            existing_report.sprint_start_date,
+            existing_report.sprint_end_date,
+            SprintStats(
+                total_story_points=existing_report.story_points_closed,
+                total_tasks=existing_report.tasks_completed,
+                deadlines_missed=existing_report.deadlines_missed,
+                average_completion_time=existing_report.average_task_completion_time,
+            ),
+            prev_report,
+            existing_report.activity_analysis,
+            existing_report.recommendations,
         )
+
+    def _build_sprint_report(
+        self,
+        user: User,
+        sprint_name: str,
+        sprint_start_date,
+        sprint_end_date,
+        stats: SprintStats,
+        prev_report: Optional[SprintReportDB],
+        activity_analysis,
+        recommendations,
+    ) -> SprintReport:
+        """
+        Build the employee sprint report comparing sprint stats with the previous report.
+        Shared by the stored and the freshly generated report paths.
+        """
         return SprintReport(
             user_id=user.id,
             employee_name=user.display_name,
-            sprint_name=sprint.name,
-            sprint_start_date=sprint.start_date,
-            sprint_end_date=sprint.end_date,
-            story_points_closed=story_points_closed,
-            tasks_completed=tasks_completed,
-            deadlines_missed=deadlines_missed,
-            average_task_completion_time=average_task_completion_time,
+            sprint_name=sprint_name,
+            sprint_start_date=sprint_start_date,
+            sprint_end_date=sprint_end_date,
+            story_points_closed=self._create_metric_comparison(
+                stats.total_story_points,
+                prev_report.story_points_closed if prev_report else None,
+            ),
+            tasks_completed=self._create_metric_comparison(
+                stats.total_tasks,
+                prev_report.tasks_completed if prev_report else None,
+            ),
+            deadlines_missed=self._create_metric_comparison(
+                stats.deadlines_missed,
+                prev_report.deadlines_missed if prev_report else None,
+            ),
+            average_task_completion_time=self._create_metric_comparison(
+                stats.average_completion_time,
+                prev_report.average_task_completion_time if prev_report else None,
+            ),
             activity_analysis=activity_analysis,
             recommendations=recommendations,
         )
 
-    def _calculate_percent_change(self, current: float, previous: float) -> float:
+    async def _generate_sprint_report_inner(
+        self,
+        user: User,
+        sprint: Sprint,
+        tracker_id: int,
+        current_user_id: int,
+        existing_report: Optional[SprintReportDB],
+        prev_report: Optional[SprintReportDB],
+    ) -> SprintReport:
         """
-        Calculate percent change between current and previous values.
-        Positive percentage means improvement, negative means decline.
+        Build the employee sprint report for an already resolved sprint and tracker.
+        The stored report for this sprint and the previous one are passed in by the caller.
         """
-        if previous == 0:
-            return 100.0 if current > 0 else 0.0
+        if existing_report:
+            return self._build_stored_sprint_report(user, existing_report, prev_report)
 
-        return ((current - previous) / previous) * 100
+        tasks, sprint_stats = await self._process_tasks(
+            self.yandex_tracker_service.iter_sprint_tasks(
+                sprint.id, current_user_id, user.login
+            ),
+            current_user_id,
+        )
+
+        try:
+            # Запросы к LLM независимы, выполняем их одновременно
+            activity_analysis, recommendations = await asyncio.gather(
+                self.yandex_gpt_service.analyze_employee_activity(tasks, sprint_stats),
+                self.yandex_gpt_service.generate_employee_recommendations(sprint_stats),
+            )
+        except Exception as e:
+            log.error(f"LLM error: {e}")
+            raise
+
+        report = self._build_sprint_report(
+            user,
+            sprint.name,
+            sprint.start_date,
+            sprint.end_date,
+            sprint_stats,
+            prev_report,
+            activity_analysis,
+            recommendations,
+        )
+        async with self._db_lock:
+            await self.report_repo.save_or_update_sprint_report(
+                user_id=user.id,
+                tracker_id=tracker_id,
+                sprint_id=sprint.id,
+                sprint_name=sprint.name,
+                sprint_start_date=sprint.start_date,
+                sprint_end_date=sprint.end_date,
+                story_points_closed=report.story_points_closed,
+                tasks_completed=report.tasks_completed,
+                deadlines_missed=report.deadlines_missed,
+                average_task_completion_time=report.average_task_completion_time,
+                activity_analysis=activity_analysis,
+                recommendations=recommendations,
+            )
+        return report
 
+    @staticmethod
     def _create_metric_comparison(
-        self, current: float, previous: Optional[float] = None
+        current: float, previous: Optional[float] = None
     ) -> MetricWithComparison:
         """
         Create a metric with comparison between current and previous sprint.
+        Positive change percentage means improvement, negative means decline.
+        Values come from our own calculations or DB, so validation is skipped.
         """
-        metric = MetricWithComparison(current=current)
+        if previous is None:
+            return MetricWithComparison.model_construct(current=current)
 
-        if previous is not None:
-            metric.previous = previous
-            metric.change_percent = self._calculate_percent_change(current, previous)
-
-        return metric
+        if previous == 0:
+            change_percent = 100.0 if current > 0 else 0.0
+        else:
+            change_percent = (current - previous) / previous * 100
+        return MetricWithComparison.model_construct(
+            current=current, previous=previous, change_percent=change_percent
+        )
 
     async def generate_team_sprint_report(
         self,
@@ -215,7 +269,7 @@ class ReportService:
         """
 
         # Получаем текущий трекер пользователя
-        tracker_info = await self.user_repo.get_user_current_tracker(current_user_id)
+        tracker_info = await self._current_tracker(current_user_id)
         if not tracker_info:
             raise ValueError("Не удалось определить tracker_id для пользователя")
         tracker, role = tracker_info
@@ -242,68 +296,106 @@ class ReportService:
 
         users = await self.user_repo.get_users_for_tracker(tracker_id)
 
-        sprint = await self.yandex_tracker_service.get_sprint(
-            sprint_id, current_user_id
-        )
+        # Спринт берём из общего списка, отдельный запрос get_sprint не нужен
+        all_sprints = await self.yandex_tracker_service.get_sprints(current_user_id)
+        sprints_by_id = {s.id: s for s in all_sprints}
+        sprint = sprints_by_id.get(sprint_id)
+        if not sprint:
+            sprint = await self.yandex_tracker_service.get_sprint(
+                sprint_id, current_user_id
+            )
         if not sprint:
             raise ValueError(f"Sprint with ID {sprint_id} not found.")
 
         prev_sprint = None
-        all_sprints = await self.yandex_tracker_service.get_sprints(current_user_id)
-        sprints_objs = all_sprints
-        sprints_sorted = sorted(sprints_objs, key=lambda s: s.start_date)
+        sprints_sorted = sorted(all_sprints, key=lambda s: s.start_date)
         for idx, s in enumerate(sprints_sorted):
             if s.id == sprint_id and idx > 0:
                 prev_sprint = sprints_sorted[idx - 1]
                 break
 
+        # Сохранённые отчёты всей команды загружаем разом, а не по пользователю
+        user_ids = [user.id for user in users]
+        async with self._db_lock:
+            existing_by_uid = await self.report_repo.get_sprint_reports_by_users(
+                user_ids, tracker_id, sprint.id
+            )
+            prev_by_uid = await self.report_repo.get_previous_sprint_reports_by_users(
+                user_ids, tracker_id, sprint.start_date
+            )
+            prev_sprint_by_uid = (
+                await self.report_repo.get_sprint_reports_by_users(
+                    user_ids, tracker_id, prev_sprint.id
+                )
+                if prev_sprint
+                else {}
+            )
+
+        semaphore = asyncio.Semaphore(TEAM_REPORT_CONCURRENCY)
+
+        async def build_report(user: User) -> SprintReport:
+            async with semaphore:
+                return await self._generate_sprint_report_inner(
+                    user,
+                    sprint,
+                    tracker_id,
+                    current_user_id,
+                    existing_by_uid.get(user.id),
+                    prev_by_uid.get(user.id),
+                )
+
+        # Отчёты сотрудников независимы: формируем их параллельно. При ошибке
+        # одного остальные отменяются и дожидаются, чтобы они не ходили в API
+        # и не писали в сессию после завершения запроса. Не TaskGroup: он
+        # обернул бы HTTPException/ValueError в ExceptionGroup
+        builds = [asyncio.ensure_future(build_report(user)) for user in users]
+        try:
+            sprint_reports = await asyncio.gather(*builds)
+        except BaseException:
+            for build in builds:
+                build.cancel()
+            await asyncio.gather(*builds, return_exceptions=True)
+            raise
+
         employee_stats = []
         prev_employee_stats = []
-        for user in users:
-            sprint_report = await self.generate_sprint_report(
-                user, sprint_id, current_user_id
-            )
-            story_points_closed = sprint_report.story_points_closed
-            tasks_completed = sprint_report.tasks_completed
-            deadlines_missed = sprint_report.deadlines_missed
-            average_task_completion_time = sprint_report.average_task_completion_time
+        for user, sprint_report in zip(users, sprint_reports):
+            # Метрики хранятся готовыми объектами: в dict они превращаются
+            # только при сохранении итогового отчёта
             employee_stats.append(
                 {
                     "employee_id": str(user.id),
                     "employee_name": user.display_name,
-                    "story_points_closed": story_points_closed.model_dump(),
-                    "tasks_completed": tasks_completed.model_dump(),
-                    "deadlines_missed": deadlines_missed.model_dump(),
-                    "average_task_completion_time": average_task_completion_time.model_dump(),
+                    "story_points_closed": sprint_report.story_points_closed,
+                    "tasks_completed": sprint_report.tasks_completed,
+                    "deadlines_missed": sprint_report.deadlines_missed,
+                    "average_task_completion_time": sprint_report.average_task_completion_time,
                 }
             )
 
-            log.debug(f"Employee stats: {employee_stats}")
-            prev_stats_report = None
-            if prev_sprint:
-                prev_stats_report = await self.report_repo.get_sprint_report_by_id(
-                    user.id, tracker_id, prev_sprint.id
-                )
+            prev_stats_report = prev_sprint_by_uid.get(user.id)
             if prev_stats_report:
                 prev_employee_stats.append(
                     {
                         "employee_id": str(user.id),
                         "employee_name": user.display_name,
-                        "story_points_closed": {
-                            "current": prev_stats_report.story_points_closed
-                        },
-                        "tasks_completed": {
-                            "current": prev_stats_report.tasks_completed
-                        },
-                        "deadlines_missed": {
-                            "current": prev_stats_report.deadlines_missed
-                        },
-                        "average_task_completion_time": {
-                            "current": prev_stats_report.average_task_completion_time
-                        },
+                        "story_points_closed": MetricWithComparison.model_construct(
+                            current=prev_stats_report.story_points_closed
+                        ),
+                        "tasks_completed": MetricWithComparison.model_construct(
+                            current=prev_stats_report.tasks_completed
+                        ),
+                        "deadlines_missed": MetricWithComparison.model_construct(
+                            current=prev_stats_report.deadlines_missed
+                        ),
+                        "average_task_completion_time": MetricWithComparison.model_construct(
+                            current=prev_stats_report.average_task_completion_time
+                        ),
                     }
                 )
 
+        log.debug("Employee stats: %s", employee_stats)
+
         try:
             llm_result = await self.yandex_gpt_service.rate_team_performance(
                 employee_stats=employee_stats,
@@ -318,25 +410,19 @@ class ReportService:
 
         employee_stats_final = []
         for emp in employee_stats:
-            rid = emp["employee_id"]
-            rating = rating_map.get(rid, {}).get("rating", 3)
-            rating_explanation = rating_map.get(rid, {}).get(
-                "rating_explanation", "Ошибка AI при оценке производительности"
-            )
+            emp_rating = rating_map.get(emp["employee_id"]) or DEFAULT_RATING
+            # Данные посчитаны сервисом, а оценка уже провалидирована
+            # схемой ответа LLM, поэтому повторная валидация не нужна
             employee_stats_final.append(
-                EmployeeSprintStats(
+                EmployeeSprintStats.model_construct(
                     employee_id=emp["employee_id"],
                     employee_name=emp["employee_name"],
-                    story_points_closed=MetricWithComparison(
-                        **emp["story_points_closed"]
-                    ),
-                    tasks_completed=MetricWithComparison(**emp["tasks_completed"]),
-                    deadlines_missed=MetricWithComparison(**emp["deadlines_missed"]),
-                    average_task_completion_time=MetricWithComparison(
-                        **emp["average_task_completion_time"]
-                    ),
-                    rating=rating,
-                    rating_explanation=rating_explanation,
+                    story_points_closed=emp["story_points_closed"],
+                    tasks_completed=emp["tasks_completed"],
+                    deadlines_missed=emp["deadlines_missed"],
+                    average_task_completion_time=emp["average_task_completion_time"],
+                    rating=emp_rating["rating"],
+                    rating_explanation=emp_rating["rating_explanation"],
                 )
             )
 
@@ -345,7 +431,7 @@ class ReportService:
             sprint_id=sprint_id,
             sprint_start_date=sprint.start_date,
             sprint_end_date=sprint.end_date,
-            employee_stats=[emp.model_dump() for emp in employee_stats_final],
+            employee_stats=EMPLOYEE_STATS_ADAPTER.dump_python(employee_stats_final),
         )
         return TeamSprintReport(
             sprint_id=sprint_id,
@@ -355,35 +441,56 @@ class ReportService:
         )
 
     async def _process_tasks(
-        self, tasks: List[Task], current_user_id: int
-    ) -> SprintStats:
+        self, task_pages: AsyncIterable[List[Task]], current_user_id: int
+    ) -> tuple[List[Task], SprintStats]:
         """
-        Process tasks to extract relevant statistics.
+        Process tasks page by page as they arrive to extract relevant statistics.
+        Returns all tasks as well, since the LLM prompt needs the full list.
         """
+        tasks = []
         total_story_points = 0
-        total_tasks = 0
         deadlines_missed = 0
-        total_completion_time = 0.0
-
-        for task in tasks:
-            total_story_points += task.story_points if task.story_points else 0
-            total_tasks += 1
-
-            if task.deadline and (
-                task.status.key == "done"
-                and task.deadline < task.resolved_at
-                or task.deadline < datetime.utcnow().date()
-            ):
-                deadlines_missed += 1
-
-            if task.status.key == "done":
-                total_completion_time += (
-                    await self.yandex_tracker_service.get_issue_logged_time(
-                        task.id, current_user_id
-                    )
-                )
+        spent_hours = 0.0
+        worklog_requests = []
+        today = datetime.now(timezone.utc).date()
+
+        try:
+            async for page in task_pages:
+                tasks.extend(page)
+                for task in page:
+                    if task.story_points:
+                        total_story_points += task.story_points
+
+                    is_done = task.status.key == "done"
+                    deadline = task.deadline
+                    if deadline and (
+                        is_done and deadline < task.resolved_at or deadline < today
+                    ):
+                        deadlines_missed += 1
+
+                    # Списанное время берётся из поля spent ответа поиска;
+                    # worklog запрашивается только для задач без него — сразу,
+                    # не дожидаясь остальных страниц (ограничение частоты
+                    # запросов обеспечивает общий HTTP-клиент)
+                    if is_done and task.spent:
+                        spent_hours += round(duration_hours(task.spent), 1)
+                    elif is_done:
+                        worklog_requests.append(
+                            asyncio.create_task(
+                                self.yandex_tracker_service.get_issue_logged_time(
+                                    task.id, current_user_id
+                                )
+                            )
+                        )
+            logged_times = await asyncio.gather(*worklog_requests)
+        except BaseException:
+            for request in worklog_requests:
+                request.cancel()
+            raise
+        total_completion_time = spent_hours + sum(logged_times)
+        total_tasks = len(tasks)
 
-        return SprintStats(
+        return tasks, SprintStats(
             total_story_points=total_story_points,
             total_tasks=total_tasks,
             deadlines_missed=deadlines_missed,
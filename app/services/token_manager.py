@@ -1,13 +1,60 @@
+import asyncio
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
 
+import jwt
+from cachetools import TTLCache
 from fastapi import HTTPException, status
-from jose import JWTError, jwt
 
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Ключ подписи подготавливается один раз при импорте, а не на каждый вызов
+_jwt_key = jwt.get_algorithm_by_name(settings.algorithm).prepare_key(
+    settings.secret_key
+)
+
+# Асимметричная подпись (RS/ES/PS) занимает миллисекунды и выносится из
+# event loop в поток; HMAC быстрее накладных расходов на поток
+_SIGN_IN_THREAD = not settings.algorithm.upper().startswith("HS")
+
+# Кэш проверенных токенов: ключ — 16-байтовый blake2b от токена, чтобы не
+# хранить сам токен. Срок exp проверяется в verify_token на каждый вызов,
+# поэтому TTL кэша ограничивает только время жизни записи
+_token_cache = TTLCache(maxsize=10_000, ttl=60)
+_token_cache_lock = threading.Lock()
+
+
+def _decode_token(token: str) -> dict:
+    """
+    Проверяет подпись и декодирует JWT токен.
+
+    Результат кэшируется на короткое время, поэтому повторные запросы с тем же
+    токеном не проверяют подпись заново. Срок действия при этом проверяется
+    в verify_token на каждый вызов.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, _jwt_key, algorithms=[settings.algorithm])
+        with _token_cache_lock:
+            _token_cache[key] = payload
+    return payload
+
+
+def _credentials_exception() -> HTTPException:
+    """Создаёт исключение 401 только на пути ошибки, а не на каждый вызов"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 
 def verify_token(token: str) -> dict:
     """
@@ -22,33 +69,23 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: Если токен невалиден или истек срок действия
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
     try:
         # Декодируем токен
-
-        logger.debug(f"token {token}|{settings.secret_key}|{[settings.algorithm]}")
-        payload = jwt.decode(
-            token, settings.secret_key, algorithms=[settings.algorithm]
-        )
-        logger.debug(f"payload {payload}")
+        payload = _decode_token(token)
+        logger.debug("payload %s", payload)
 
         # Проверяем обязательные поля
         if payload.get("sub") is None:
             logger.warning("Token missing 'sub' claim")
-            raise credentials_exception
+            raise _credentials_exception()
 
         # Проверяем срок действия
         expire = payload.get("exp")
         if expire is None:
             logger.warning("Token missing 'exp' claim")
-            raise credentials_exception
+            raise _credentials_exception()
 
-        if datetime.utcnow() > datetime.fromtimestamp(expire):
+        if time.time() > expire:
             logger.warning(f"Token expired at {datetime.fromtimestamp(expire)}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
@@ -56,9 +93,9 @@ def verify_token(token: str) -> dict:
 
         return payload
 
-    except JWTError as e:
+    except jwt.PyJWTError as e:
         logger.error(f"JWT validation error: {str(e)}")
-        raise credentials_exception from e
+        raise _credentials_exception() from e
 
 
 def generate_access_jwt(user_id: str, yandex_id: str) -> str:
@@ -66,10 +103,9 @@ def generate_access_jwt(user_id: str, yandex_id: str) -> str:
     payload = {
         "sub": str(user_id),
         "yandex_id": str(yandex_id),
-        "exp": datetime.utcnow()
-        + timedelta(minutes=settings.access_token_expire_minutes),
+        "exp": int(time.time()) + settings.access_token_expire_minutes * 60,
     }
-    return jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm)
+    return jwt.encode(payload, _jwt_key, algorithm=settings.algorithm)
 
 
 def generate_refresh_jwt(user_id: str, yandex_id: str) -> str:
@@ -77,6 +113,19 @@ def generate_refresh_jwt(user_id: str, yandex_id: str) -> str:
     payload = {
         "sub": str(user_id),
         "yandex_id": str(yandex_id),
-        "exp": datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days),
+        "exp": int(time.time()) + settings.refresh_token_expire_days * 86400,
     }
-    return jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm)
+    return jwt.encode(payload, _jwt_key, algorithm=settings.algorithm)
+
+
+def _generate_jwt_pair(user_id: str, yandex_id: str) -> tuple[str, str]:
+    return generate_access_jwt(user_id, yandex_id), generate_refresh_jwt(
+        user_id, yandex_id
+    )
+
+
+async def generate_jwt_pair(user_id: str, yandex_id: str) -> tuple[str, str]:
+    """Генерация пары access/refresh токенов без блокировки event loop"""
+    if _SIGN_IN_THREAD:
+        return await asyncio.to_thread(_generate_jwt_pair, user_id, yandex_id)
+    return _generate_jwt_pair(user_id, yandex_id)
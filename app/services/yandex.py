@@ -1,95 +1,104 @@
 import base64
 import logging
-from datetime import datetime, timedelta
+from urllib.parse import quote_plus, urlencode
 
 import httpx
 from fastapi import HTTPException, status
+from pydantic import BaseModel
+from pydantic_core import from_json
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.yandex import YandexIdInfo
 
 from ..config import settings
 from ..database.repositories.user import UserRepository
-from ..database.user import User
 from ..schemas.auth import YandexTokenResponse
-from .token_manager import generate_access_jwt, generate_refresh_jwt
+from ..utils.errors import translate_errors
+from .http_client import error_for_status, send_request
+from .token_manager import generate_jwt_pair
 
 log = logging.getLogger(__name__)
 
+# Учётные данные приложения статичны: заголовки для OAuth собираются один раз
+YANDEX_BASIC_AUTH = (
+    "Basic "
+    + base64.b64encode(
+        f"{settings.yandex_client_id}:{settings.yandex_client_secret}".encode()
+    ).decode()
+)
+OAUTH_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Authorization": YANDEX_BASIC_AUTH,
+}
+
+# Тела запросов за токенами: статичная часть формы закодирована заранее,
+# на каждый запрос дописывается только код или refresh token
+AUTH_CODE_BODY_PREFIX = (
+    urlencode(
+        {
+            "grant_type": "authorization_code",
+            "redirect_uri": settings.yandex_redirect_uri,
+        }
+    )
+    + "&code="
+)
+REFRESH_TOKEN_BODY_PREFIX = "grant_type=refresh_token&refresh_token="
+
+# Постоянная часть URL авторизации собирается один раз, к ней добавляется state
+YANDEX_AUTH_PARAMS = {
+    "response_type": "code",
+    "client_id": settings.yandex_client_id,
+    "redirect_uri": settings.yandex_redirect_uri,
+    "scope": "tracker:read login:email login:info",
+}
+YANDEX_AUTH_URL = f"https://oauth.yandex.ru/authorize?{urlencode(YANDEX_AUTH_PARAMS)}"
+
+
+# Ответы API Яндекса с ошибкой -> (статус, сообщение) для клиента
+YANDEX_API_ERRORS = {
+    401: (
+        status.HTTP_401_UNAUTHORIZED,
+        "Недействительный или просроченный токен Яндекс OAuth",
+    ),
+}
+YANDEX_API_ERROR = (status.HTTP_400_BAD_REQUEST, "Ошибка при запросе к Яндекс API")
+OAUTH_UNAVAILABLE = (
+    status.HTTP_503_SERVICE_UNAVAILABLE,
+    "Сервис авторизации Яндекс временно недоступен",
+)
+GET_TOKEN_ERRORS = {
+    400: (
+        status.HTTP_400_BAD_REQUEST,
+        "Неверный код авторизации или истек срок его действия",
+    ),
+}
+REFRESH_TOKEN_ERRORS = {
+    400: (status.HTTP_401_UNAUTHORIZED, "Недействительный refresh token"),
+}
+
+
+def get_auth_url(state: str | None = None) -> dict:
+    """Генерация URL для авторизации через Яндекс"""
+    auth_url = YANDEX_AUTH_URL
+    if state:
+        auth_url += "&state=" + quote_plus(state)
+    return {"auth_url": auth_url, "state": state}
+
 
 class YandexService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, user_repo: UserRepository):
         self.db = db
-        self.user_repo = UserRepository(db)
+        self.user_repo = user_repo
 
-    async def _make_yandex_tracker_request(
-        self, method: str, url: str, access_token: str, org_id: str, data: dict = None
+    async def _make_yandex_request(
+        self, url: str, access_token: str, model: type[BaseModel] = None
     ):
         """Общий метод для запросов к Яндекс API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.request(
-                    method,
-                    url,
-                    headers={
-                        "Authorization": f"OAuth {access_token}",
-                        "X-Org-ID": org_id,
-                        "X-Cloud-Org-ID": org_id,
-                    },
-                    timeout=10.0,
-                    json=data,
-                )
-                response.raise_for_status()
-                return response.json()
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Недействительный или просроченный токен Яндекс.Трекера",
-                )
-            elif e.response.status_code == 403:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Недостаточно прав для выполнения операции",
-                )
-            elif e.response.status_code == 404:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Запрашиваемый ресурс не найден",
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Сервис Яндекс.Трекера временно недоступен",
-                )
-        except httpx.RequestError:
-            raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="Превышено время ожидания ответа от Яндекс.Трекера",
-            )
-
-    async def _make_yandex_request(self, url: str, access_token: str):
-        """Общий метод для запросов к Яндекс API"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    url,
-                    headers={"Authorization": f"OAuth {access_token}"},
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                return response.json()
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Недействительный или просроченный токен Яндекс OAuth",
-                )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Ошибка при запросе к Яндекс API: {str(e)}",
+            response = await send_request(
+                "GET",
+                url,
+                headers={"Authorization": f"OAuth {access_token}"},
             )
         except httpx.RequestError:
             raise HTTPException(
@@ -97,204 +106,67 @@ class YandexService:
                 detail="Сервис Яндекс OAuth временно недоступен",
             )
 
-    async def _get_token(self, code: str) -> YandexTokenResponse:
-        """Получение токенов от Яндекс OAuth"""
-        auth_string = f"{settings.yandex_client_id}:{settings.yandex_client_secret}"
-        basic_auth = base64.b64encode(auth_string.encode()).decode()
-
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://oauth.yandex.ru/token",
-                    data={
-                        "grant_type": "authorization_code",
-                        "code": code,
-                        "redirect_uri": settings.yandex_redirect_uri,
-                    },
-                    headers={
-                        "Content-Type": "application/x-www-form-urlencoded",
-                        "Authorization": f"Basic {basic_auth}",
-                    },
-                )
-                response.raise_for_status()
-                return YandexTokenResponse(**response.json())
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 400:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Неверный код авторизации или истек срок его действия",
-                )
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Сервис авторизации Яндекс временно недоступен",
-            )
-        except Exception as e:
-            log.error(f"Ошибка получения токена: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Внутренняя ошибка при получении токена",
-            )
-
-    async def _refresh_token(self, refresh_token: str) -> YandexTokenResponse:
-        """Обновление истёкшего токена Яндекса"""
-        auth_string = f"{settings.yandex_client_id}:{settings.yandex_client_secret}"
-        basic_auth = base64.b64encode(auth_string.encode()).decode()
+        if not 200 <= response.status_code < 300:
+            log.warning(f"Yandex API responded {response.status_code} for {url}")
+            raise error_for_status(response, YANDEX_API_ERRORS, YANDEX_API_ERROR)
+        if model is not None:
+            return model.model_validate_json(response.content)
+        return from_json(response.content)
 
+    async def _request_token(self, body: str, errors: dict[int, tuple[int, str]]):
+        """Запрос к OAuth-эндпоинту Яндекса за токенами"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://oauth.yandex.ru/token",
-                    data={
-                        "grant_type": "refresh_token",
-                        "refresh_token": refresh_token,
-                    },
-                    headers={
-                        "Content-Type": "application/x-www-form-urlencoded",
-                        "Authorization": f"Basic {basic_auth}",
-                    },
-                )
-                response.raise_for_status()
-                return YandexTokenResponse(**response.json())
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 400:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Недействительный refresh token",
-                )
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Сервис авторизации Яндекс временно недоступен",
+            response = await send_request(
+                "POST",
+                "https://oauth.yandex.ru/token",
+                content=body.encode(),
+                headers=OAUTH_HEADERS,
             )
-        except Exception as e:
-            log.error(f"Ошибка обновления токена: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Внутренняя ошибка при обновлении токена",
-            )
-
-    def _is_token_expired(self, expires_at: datetime) -> bool:
-        """Проверяет истёк ли срок действия токена"""
-        return datetime.utcnow() > expires_at if expires_at else True
+        except httpx.RequestError:
+            raise HTTPException(*OAUTH_UNAVAILABLE)
 
-    @staticmethod
-    async def get_auth_url(state: str = None) -> dict:
-        """Генерация URL для авторизации через Яндекс"""
-        try:
-            params = {
-                "response_type": "code",
-                "client_id": settings.yandex_client_id,
-                "redirect_uri": settings.yandex_redirect_uri,
-                "scope": "tracker:read login:email login:info",
-            }
-            if state:
-                params["state"] = state
+        if not 200 <= response.status_code < 300:
+            raise error_for_status(response, errors, OAUTH_UNAVAILABLE)
+        return YandexTokenResponse.model_validate_json(response.content)
 
-            return {
-                "auth_url": f"https://oauth.yandex.ru/authorize?{httpx.QueryParams(params)}",
-                "state": state,
-            }
-        except Exception as e:
-            log.error(f"Ошибка генерации auth URL: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при генерации URL авторизации",
-            )
+    async def _get_token(self, code: str) -> YandexTokenResponse:
+        """Получение токенов от Яндекс OAuth"""
+        return await self._request_token(
+            AUTH_CODE_BODY_PREFIX + quote_plus(code), GET_TOKEN_ERRORS
+        )
 
+    async def _refresh_token(self, refresh_token: str) -> YandexTokenResponse:
+        """Обновление истёкшего токена Яндекса"""
+        return await self._request_token(
+            REFRESH_TOKEN_BODY_PREFIX + quote_plus(refresh_token),
+            REFRESH_TOKEN_ERRORS,
+        )
+
+    @translate_errors(
+        "Ошибка обработки callback", "Ошибка при обработке авторизации", exc_info=True
+    )
     async def handle_callback(self, code: str) -> YandexTokenResponse:
         """Обработка callback после авторизации через Яндекс"""
-        try:
-            token_data = await self._get_token(code)
-            user_info = await self._get_user_info(token_data.access_token)
-
-            user = await self.user_repo.create_or_update_from_yandex_id(
-                user_info, token_data
-            )
-
-            return YandexTokenResponse(
-                access_token=generate_access_jwt(user.id, user.yandex_id),
-                refresh_token=generate_refresh_jwt(user.id, user.yandex_id),
-                token_type="bearer",
-                expires_in=settings.access_token_expire_minutes * 60,
-                yandex_id=user.yandex_id,
-            )
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка обработки callback: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при обработке авторизации",
-            )
+        token_data = await self._get_token(code)
+        user_info = await self._get_user_info(token_data.access_token)
+
+        user = await self.user_repo.create_or_update_from_yandex_id(
+            user_info, token_data
+        )
+
+        access_token, refresh_token = await generate_jwt_pair(user.id, user.yandex_id)
+        return YandexTokenResponse(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+            expires_in=settings.access_token_expire_minutes * 60,
+            yandex_id=user.yandex_id,
+        )
 
     async def _get_user_info(self, token: str) -> YandexIdInfo:
         """Получение информации о пользователе по токену после авторизации"""
-        try:
-            return YandexIdInfo(
-                **await self._make_yandex_request("https://login.yandex.ru/info", token)
-            )
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка получения информации о пользователе: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при получении данных пользователя",
-            )
-
-    async def _get_user_with_valid_token(self, user_id: int) -> User:
-        """Получает пользователя и обновляет токен при необходимости"""
-        try:
-            user = await self.user_repo.get_by_id(user_id)
-            tracker = await self.user_repo.get_user_current_tracker(user_id)
-            if tracker:
-                user.org_id = tracker[0].yandex_org_id or tracker[0].yandex_cloud_id
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Пользователь не найден",
-                )
-            if not user.yandex_token:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Токен Яндекс не привязан к учетной записи",
-                )
-
-            if self._is_token_expired(user.yandex_token_expires):
-                if not user.yandex_refresh_token:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Отсутствует refresh token для обновления",
-                    )
-                return await self._refresh_and_update_user_tokens(user)
-            return user
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка проверки токена пользователя: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при проверке токена",
-            )
-
-    async def _refresh_and_update_user_tokens(self, user: User) -> User:
-        """Обновляет токены пользователя"""
-        try:
-            new_tokens = await self._refresh_token(user.yandex_refresh_token)
-            return await self.user_repo.update_yandex_tokens(
-                user.id,
-                new_tokens.access_token,
-                new_tokens.refresh_token,
-                timedelta(seconds=new_tokens.expires_in),
-            )
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка обновления токенов: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при обновлении токенов",
-            )
+        # Ответ валидируется прямо из байтов: Яндекс отдаёт id строкой,
+        # поэтому приведение типов нужно и пропускать валидацию нельзя
+        return await self._make_yandex_request(
+            "https://login.yandex.ru/info", token, YandexIdInfo
+        )
@@ -1,48 +1,84 @@
-import json
+import asyncio
 import logging
+from operator import methodcaller
 from typing import Any, Dict, List, Optional, Type
 
-from pydantic import BaseModel, Field, ValidationError
+from cachetools import TTLCache
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from yandex_cloud_ml_sdk import AsyncYCloudML
 from yandex_cloud_ml_sdk._models.completions.result import Alternative, GPTModelResult
 
 from app.config import settings
-from app.schemas.sprint_report import Recommendation
+from app.schemas.recommendation import Recommendation
+from app.schemas.report import SprintStats
 from app.schemas.yandex_tracker import Task
 from app.services import prompts
-from app.services.report_service import SprintStats
 
 log = logging.getLogger(__name__)
 
+_get_is_completed = methodcaller("get", "is_completed")
+
+# Отчёты команды запускают LLM-запросы всех сотрудников параллельно;
+# общий семафор держит их число в пределах квоты Yandex GPT
+_llm_semaphore = asyncio.Semaphore(settings.yc_max_concurrency)
+
+# Ответы LLM по (system_prompt, user_prompt, класс ответа): повторная генерация
+# отчёта по тем же данным не ходит в API. TTL ограничивает срок, после
+# которого тот же запрос снова получит свежий ответ модели
+_llm_cache: TTLCache = TTLCache(maxsize=256, ttl=600)
+
+# Начиная с этого числа строк статистики блоки промпта форматируются в
+# потоке, чтобы не держать цикл событий; на меньших объёмах переход в поток
+# дороже самого форматирования
+STATS_BLOCK_THREAD_THRESHOLD = 200
+
+EMPTY_EMPLOYEE_ACTIVITY = "Сотрудник не выполнил задач в спринте."
+EMPTY_TEAM_ACTIVITY = "У команды нет задач в спринте."
+
+
+# Схемы ответов уходят в response_format: закрытый набор полей и отсутствие
+# лишних описаний сужают грамматику ответа и число токенов генерации
+_CLOSED_SCHEMA = {"additionalProperties": False}
+
 
 class TextResponse(BaseModel):
     """Pydantic model for simple text responses, expecting {"text": "..."}."""
 
-    text: str = Field(description="The generated text content.")
+    model_config = ConfigDict(frozen=True, json_schema_extra=_CLOSED_SCHEMA)
+
+    text: str
 
 
 class RecommendationsResponse(BaseModel):
     """Pydantic model for list of recommendations, expecting {"recommendations": [...]} ."""
 
-    recommendations: List[Recommendation] = Field(
-        description="List of recommendations."
-    )
+    model_config = ConfigDict(frozen=True, json_schema_extra=_CLOSED_SCHEMA)
+
+    # Используются только первые три; maxItems только в схеме, без
+    # валидации, чтобы лишняя рекомендация не роняла отчёт
+    recommendations: List[Recommendation] = Field(json_schema_extra={"maxItems": 3})
 
 
 class RatingResponse(BaseModel):
     """Pydantic model for employee rating and explanation, expecting {"rating": N, "explanation": "..."}."""
 
-    rating: int = Field(ge=1, le=5, description="The numerical rating (1-5).")
-    explanation: str = Field(description="The explanation for the rating.")
+    model_config = ConfigDict(frozen=True, json_schema_extra=_CLOSED_SCHEMA)
+
+    rating: int = Field(ge=1, le=5)
+    explanation: str
 
 
 class TeamRatingItem(BaseModel):
+    model_config = ConfigDict(frozen=True, json_schema_extra=_CLOSED_SCHEMA)
+
     employee_id: str
     rating: int = Field(ge=1, le=5)
     rating_explanation: str
 
 
 class TeamRatingList(BaseModel):
+    model_config = ConfigDict(frozen=True, json_schema_extra=_CLOSED_SCHEMA)
+
     ratings: List[TeamRatingItem]
 
 
@@ -64,8 +100,8 @@ class YandexGPTMLService:
             auth_param = settings.yc_iam_token
 
         if not auth_param:
-            print(
-                "Warning: No YC_API_KEY or YC_IAM_TOKEN found. Attempting SDK default auth."
+            log.warning(
+                "No YC_API_KEY or YC_IAM_TOKEN found. Attempting SDK default auth."
             )
 
         try:
@@ -80,6 +116,9 @@ class YandexGPTMLService:
             raise ConnectionError(
                 f"Failed to initialize Yandex Cloud ML SDK: {e}. Ensure credentials are set."
             ) from e
+        # Модели, настроенные на response_format, по классу ответа: настройка
+        # (и схема JSON) строится один раз, а не на каждый вызов
+        self._configured_models: Dict[Type[BaseModel], Any] = {}
 
     async def _call_llm_structured(
         self,
@@ -88,6 +127,11 @@ class YandexGPTMLService:
         response_model: Type[BaseModel],
     ) -> BaseModel:
         """Calls Yandex GPT API async, requests structured output, extracts JSON from result, parses and returns Pydantic instance."""
+        cache_key = (system_prompt, user_prompt, response_model)
+        cached = _llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         messages = []
         if system_prompt:
             messages.append({"role": "system", "text": system_prompt})
@@ -96,10 +140,16 @@ class YandexGPTMLService:
         result = None
         json_string = None
         try:
-            configured_model = self.base_model.configure(response_format=response_model)
+            configured_model = self._configured_models.get(response_model)
+            if configured_model is None:
+                configured_model = self.base_model.configure(
+                    response_format=response_model
+                )
+                self._configured_models[response_model] = configured_model
 
-            log.debug(f"Run configured model: {configured_model}")
-            result = await configured_model.run(messages)
+            log.debug("Run configured model: %s", configured_model)
+            async with _llm_semaphore:
+                result = await configured_model.run(messages)
 
             if not isinstance(result, GPTModelResult):
                 raise ConnectionError(
@@ -117,19 +167,17 @@ class YandexGPTMLService:
                 )
 
             json_string = alternative.text
-            parsed_response = response_model.parse_raw(json_string)
+            # Разбор и валидация JSON за один проход (jiter)
+            parsed_response = response_model.model_validate_json(json_string)
+            _llm_cache[cache_key] = parsed_response
             return parsed_response
 
-        except json.JSONDecodeError as jde:
-            print(
-                f"Yandex GPT JSON Decode Error: {jde}. Extracted text: '{json_string}'"
-            )
-            raise ConnectionError(
-                f"LLM response text was not valid JSON: {jde}. Text: '{json_string}'"
-            ) from jde
         except ValidationError as ve:
-            print(
-                f"Yandex GPT Pydantic Validation Error: {ve}. Extracted text: '{json_string}'"
+            # Невалидный JSON тоже приходит как ValidationError (json_invalid)
+            log.error(
+                "Yandex GPT Pydantic Validation Error: %s. Extracted text: '%s'",
+                ve,
+                json_string,
             )
             raise ConnectionError(
                 f"LLM response failed validation for {response_model.__name__}: {ve}. Text: '{json_string}'"
@@ -137,7 +185,7 @@ class YandexGPTMLService:
         except ConnectionError as ce:
             raise ce
         except Exception as e:
-            print(f"Yandex GPT ML SDK Async Error: {e}. Raw result: {result}")
+            log.exception("Yandex GPT ML SDK Async Error. Raw result: %s", result)
             error_str = str(e).lower()
             if (
                 "unprocessable entity" in error_str
@@ -158,11 +206,17 @@ class YandexGPTMLService:
     async def analyze_employee_activity(
         self, tasks: list[Task], sprint_stats: SprintStats
     ) -> str:
+        # Анализировать нечего: фиксированный ответ без запроса к LLM
+        if not tasks and sprint_stats.total_tasks == 0:
+            return EMPTY_EMPLOYEE_ACTIVITY
+
         system_prompt = prompts.EMPLOYEE_ACTIVITY_SYSTEM
-        task_descriptions = [
-            f"Summary: {task.summary}. Status: {task.status.key}" for task in tasks
-        ]
-        task_descriptions_str = "\n".join(task_descriptions) or "Нет задач для анализа."
+        task_descriptions_str = (
+            "\n".join(
+                f"Summary: {task.summary}. Status: {task.status.key}" for task in tasks
+            )
+            or "Нет задач для анализа."
+        )
         user_prompt = prompts.EMPLOYEE_ACTIVITY_USER.format(
             task_descriptions=task_descriptions_str,
             story_points_closed=sprint_stats.total_story_points,
@@ -197,14 +251,15 @@ class YandexGPTMLService:
     ) -> str:
         system_prompt = prompts.TEAM_ACTIVITY_SYSTEM
 
-        total_tasks = sum(len(t) for t in tasks_by_employee.values())
-        total_completed = sum(
-            sum(1 for task in tasks if task.get("is_completed"))
-            for tasks in tasks_by_employee.values()
-        )
-        avg_completion_rate = (
-            (total_completed / total_tasks * 100) if total_tasks > 0 else 0
-        )
+        # Один проход по сотрудникам; флаги считаются через map/bool в C
+        total_tasks = 0
+        total_completed = 0
+        for tasks in tasks_by_employee.values():
+            total_tasks += len(tasks)
+            total_completed += sum(map(bool, map(_get_is_completed, tasks)))
+        if total_tasks == 0:
+            return EMPTY_TEAM_ACTIVITY
+        avg_completion_rate = total_completed / total_tasks * 100
 
         user_prompt = prompts.TEAM_ACTIVITY_USER.format(
             total_tasks=total_tasks,
@@ -246,22 +301,32 @@ class YandexGPTMLService:
         """
         Анализирует командные метрики и возвращает список рейтингов и объяснений для каждого сотрудника.
         """
+        if not employee_stats:
+            return []
 
         def stats_block(stats_list):
-            lines = []
-            for emp in stats_list:
-                log.debug(f"Emp: {emp}")
-                lines.append(
-                    f"- {emp['employee_name']} (ID: {emp['employee_id']}): SP={emp['story_points_closed']['current']}, "
-                    f"Задачи={emp['tasks_completed']['current']}, Пропуски={emp['deadlines_missed']['current']}, "
-                    f"Ср.Время={emp['average_task_completion_time']['current']}"
-                )
-            return "\n".join(lines)
+            return "\n".join(
+                f"- {emp['employee_name']} (ID: {emp['employee_id']}): SP={emp['story_points_closed'].current}, "
+                f"Задачи={emp['tasks_completed'].current}, Пропуски={emp['deadlines_missed'].current}, "
+                f"Ср.Время={emp['average_task_completion_time'].current}"
+                for emp in stats_list
+            )
 
-        employee_stats_block = stats_block(employee_stats)
-        prev_employee_stats_block = (
-            stats_block(prev_employee_stats) if prev_employee_stats else "нет данных"
-        )
+        def build_blocks():
+            return (
+                stats_block(employee_stats),
+                stats_block(prev_employee_stats)
+                if prev_employee_stats
+                else "нет данных",
+            )
+
+        total_rows = len(employee_stats) + len(prev_employee_stats or ())
+        if total_rows > STATS_BLOCK_THREAD_THRESHOLD:
+            employee_stats_block, prev_employee_stats_block = await asyncio.to_thread(
+                build_blocks
+            )
+        else:
+            employee_stats_block, prev_employee_stats_block = build_blocks()
         system_prompt = prompts.TEAM_RATING_SYSTEM
         user_prompt = prompts.TEAM_RATING_USER.format(
             employee_stats_block=employee_stats_block,
@@ -270,4 +335,23 @@ class YandexGPTMLService:
         llm_response: TeamRatingList = await self._call_llm_structured(
             system_prompt, user_prompt, response_model=TeamRatingList
         )
-        return [item.model_dump() for item in llm_response.ratings]
+        # Ответ уже провалидирован схемой: поля берутся из __dict__ без
+        # повторного обхода модели через model_dump
+        return [item.__dict__.copy() for item in llm_response.ratings]
+
+
+_service: YandexGPTMLService | None = None
+
+
+def get_yandex_gpt_service() -> YandexGPTMLService:
+    """
+    Возвращает общий экземпляр сервиса, создавая его при первом обращении.
+
+    SDK кэширует gRPC-каналы внутри клиента, поэтому единый экземпляр
+    держит соединения с Yandex GPT открытыми между запросами вместо нового
+    TLS-рукопожатия на каждый отчёт.
+    """
+    global _service
+    if _service is None:
+        _service = YandexGPTMLService()
+    return _service
@@ -1,322 +1,546 @@
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import re
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable
 
 import httpx
+from cachetools import TTLCache
 from fastapi import HTTPException, status
 from isodate import parse_duration
+from pydantic import TypeAdapter
+from pydantic_core import from_json, to_json
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.schemas.yandex_tracker import Sprint
-
+from ..database import get_session_lock
 from ..database.repositories.user import UserRepository
 from ..database.user import User
-from ..schemas.yandex_tracker import Task
+from ..schemas.auth import YandexTokenResponse
+from ..schemas.yandex_tracker import Sprint, Task
+from ..utils.errors import translate_errors
+from .http_client import TRACKER_BASE_URL, error_for_status, send_request
+from .yandex import YandexService
 
 log = logging.getLogger(__name__)
 
+# Пути API трекера относительно TRACKER_BASE_URL (у трекера свой пул
+# соединений); параметризованные — через связанный str.format
+URL_USERS = "/v2/users"
+URL_SPRINTS = "/v2/sprints"
+URL_ISSUES_SEARCH = "/v3/issues/_search"
+URL_SPRINT = "/v3/sprints/{}".format
+URL_ISSUE_WORKLOG = "/v3/issues/{}/worklog".format
+
+# Поля пользователя, которые реально используются при синхронизации
+USER_FIELDS = "passportUid,login,email,firstName,lastName,display"
+
+# Поля задачи, которые читает схема Task: остальные поля трекер не передаёт
+TASK_FIELDS = "id,key,summary,storyPoints,deadline,resolvedAt,status,spent"
+
+# Список задач разбирается и валидируется прямо из байтов ответа (pydantic-core),
+# без промежуточных dict из response.json()
+TASK_LIST_ADAPTER = TypeAdapter(list[Task])
+SPRINT_LIST_ADAPTER = TypeAdapter(list[Sprint])
+SPRINT_ADAPTER = TypeAdapter(Sprint)
+
+# Размер страницы при постраничном поиске задач
+TASKS_PAGE_SIZE = 100
+
+# Ответы API трекера с ошибкой -> (статус, сообщение) для клиента
+TRACKER_ERRORS = {
+    401: (
+        status.HTTP_401_UNAUTHORIZED,
+        "Недействительный или просроченный токен Яндекс.Трекера",
+    ),
+    403: (status.HTTP_403_FORBIDDEN, "Недостаточно прав для выполнения операции"),
+    404: (status.HTTP_404_NOT_FOUND, "Запрашиваемый ресурс не найден"),
+    # Повторы в send_request исчерпаны — клиенту отдаётся 429 с Retry-After
+    429: (
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        "Превышен лимит запросов к Яндекс.Трекеру, повторите попытку позже",
+    ),
+}
+TRACKER_UNAVAILABLE = (
+    status.HTTP_503_SERVICE_UNAVAILABLE,
+    "Сервис Яндекс.Трекера временно недоступен",
+)
+
+# Загрузки пользователя в процессе по user_id: параллельные запросы одного
+# пользователя ждут одну загрузку из БД и одно обновление токена
+_user_loads: dict[int, asyncio.Future] = {}
+
+# Заголовки авторизации пользователей с действующим токеном: горячие пути
+# не ходят в БД перед каждым обращением к API трекера. Значение —
+# (заголовки или None без org_id, срок токена в epoch). ORM-объекты между
+# запросами не кэшируются
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# Ответы редко меняющихся GET (пользователи и спринты трекера) по
+# (url, параметры, Authorization, org) -> (время получения, ETag, ответ).
+# Свежий ответ отдаётся без запроса, устаревший перепроверяется условным
+# запросом с If-None-Match: при 304 тело не передаётся и не разбирается.
+# Токен в ключе: видимость данных зависит от прав пользователя
+GET_CACHE_FRESH = 30
+_get_cache: TTLCache = TTLCache(maxsize=1024, ttl=600)
+_get_loads: dict[tuple, asyncio.Future] = {}
+
+# Токен считается истёкшим на минуту раньше срока: закэшированные заголовки
+# не уходят в запрос, который Яндекс получит уже после истечения токена
+TOKEN_EXPIRY_MARGIN = 60
+
+
+def _token_deadline(expires_at: datetime | None) -> float:
+    """Срок действия токена в секундах epoch с запасом (0 — токен истёк)"""
+    if not expires_at:
+        return 0.0
+    return expires_at.timestamp() - TOKEN_EXPIRY_MARGIN
+
+
+async def _coalesce(loads: dict, key, load: Callable[[], Awaitable]):
+    """
+    Параллельные вызовы с одним ключом разделяют одну загрузку load()
+    вместе с её результатом или ошибкой
+    """
+    inflight = loads.get(key)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # Отменили не нас, а загружавший запрос — загружаем сами
+            if not inflight.cancelled():
+                raise
+
+    future = loads[key] = asyncio.get_running_loop().create_future()
+    try:
+        result = await load()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Ошибку получит вызывающий; ожидающих может и не быть
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if loads.get(key) is future:
+            del loads[key]
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Сбрасывает кэш пользователя после смены текущего трекера или токенов"""
+    _user_cache.pop(user_id, None)
+
+
+# Длительности, которые отдаёт трекер (PT1H30M, P1DT4H, P2W): разбираются
+# одним регулярным выражением, isodate — только для остальных форм
+_ISO_DURATION = re.compile(
+    r"P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?"
+)
+
+
+def duration_hours(duration: str) -> float:
+    """Длительность ISO 8601 из трекера в часах (0 для нераспознанной)"""
+    match = _ISO_DURATION.fullmatch(duration)
+    if match:
+        weeks, days, hours, minutes, seconds = match.groups()
+        return (
+            int(weeks or 0) * 168
+            + int(days or 0) * 24
+            + int(hours or 0)
+            + int(minutes or 0) / 60
+            + float(seconds or 0) / 3600
+        )
+    try:
+        duration_obj = parse_duration(duration)
+    except ValueError:
+        return 0.0
+    if hasattr(duration_obj, "total_seconds"):
+        seconds = duration_obj.total_seconds()
+    else:
+        seconds = duration_obj.days * 24 * 3600 + duration_obj.seconds
+    return seconds / 3600
+
 
 class YandexTrackerService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, user_repo: UserRepository):
         self.db = db
-        self.user_repo = UserRepository(db)
+        self.user_repo = user_repo
+        # Сессия БД не допускает конкурентного использования, а методы сервиса
+        # могут вызываться параллельно (asyncio.gather), поэтому обращения
+        # к БД при проверке токена выполняются под блокировкой сессии
+        self._db_lock = get_session_lock(db)
 
-    async def _make_yandex_tracker_request(
-        self, method: str, url: str, access_token: str, org_id: str, data: dict = None
-    ):
-        """Общий метод для запросов к Яндекс API"""
+    async def _send_tracker_request(
+        self,
+        method: str,
+        url: str,
+        headers: httpx.Headers,
+        data: dict | None = None,
+        params: dict | None = None,
+        idempotent: bool | None = None,
+    ) -> httpx.Response:
+        """Отправляет запрос к API трекера; ошибки переводятся в HTTPException"""
+        content = None
+        if data is not None:
+            # Тело запроса кодируется pydantic-core, как и разбирается ответ;
+            # Content-Type добавляется только к запросам с телом
+            content = to_json(data)
+            headers = headers.copy()
+            headers["Content-Type"] = "application/json"
         try:
-            log.debug(f"Making request to Yandex Tracker: {method} {url}")
-            async with httpx.AsyncClient() as client:
-                response = await client.request(
-                    method,
-                    url,
-                    headers={
-                        "Authorization": f"OAuth {access_token}",
-                        "X-Org-ID": org_id,
-                        "X-Cloud-Org-ID": org_id,
-                    },
-                    timeout=10.0,
-                    json=data,
-                )
-                response.raise_for_status()
-                return response.json()
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Недействительный или просроченный токен Яндекс.Трекера",
-                )
-            elif e.response.status_code == 403:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Недостаточно прав для выполнения операции",
-                )
-            elif e.response.status_code == 404:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Запрашиваемый ресурс не найден",
-                )
-            else:
-                log.error(f"Ошибка при запросе к Яндекс.Трекеру: {e}")
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Сервис Яндекс.Трекера временно недоступен",
-                )
+            log.debug("Making request to Yandex Tracker: %s %s", method, url)
+            response = await send_request(
+                method,
+                url,
+                base_url=TRACKER_BASE_URL,
+                headers=headers,
+                content=content,
+                params=params,
+                idempotent=idempotent,
+            )
         except httpx.RequestError:
             raise HTTPException(
                 status_code=status.HTTP_504_GATEWAY_TIMEOUT,
                 detail="Превышено время ожидания ответа от Яндекс.Трекера",
             )
 
-    async def _get_user_with_valid_token(self, user_id: int) -> User:
-        """Получает пользователя и обновляет токен при необходимости"""
-        try:
-            user = await self.user_repo.get_by_id(user_id)
-            tracker = await self.user_repo.get_user_current_tracker(user_id)
-            if tracker:
-                user.org_id = tracker[0].yandex_org_id or tracker[0].yandex_cloud_id
-            if not user:
+        # Успешный ответ проверяется одним сравнением кода, без raise_for_status
+        # и исключения HTTPStatusError; 304 — ответ на условный запрос
+        if not 200 <= response.status_code < 300 and response.status_code != 304:
+            if response.status_code not in TRACKER_ERRORS:
+                log.error(
+                    f"Ошибка при запросе к Яндекс.Трекеру: "
+                    f"{response.status_code} {method} {url}"
+                )
+            raise error_for_status(response, TRACKER_ERRORS, TRACKER_UNAVAILABLE)
+        return response
+
+    async def _make_yandex_tracker_request(
+        self,
+        method: str,
+        url: str,
+        headers: httpx.Headers,
+        data: dict | None = None,
+        params: dict | None = None,
+        adapter: TypeAdapter | None = None,
+        idempotent: bool | None = None,
+    ):
+        """Общий метод для запросов к Яндекс API"""
+        response = await self._send_tracker_request(
+            method, url, headers, data, params, idempotent
+        )
+        if adapter is not None:
+            return adapter.validate_json(response.content)
+        # Разбор JSON в pydantic-core (Rust) быстрее stdlib json
+        return from_json(response.content)
+
+    @translate_errors(
+        "Ошибка проверки токена пользователя", "Ошибка при проверке токена"
+    )
+    async def _get_tracker_headers(self, user_id: int) -> httpx.Headers | None:
+        """
+        Заголовки авторизации трекера для пользователя (None, если у текущего
+        трекера нет org_id); токен обновляется при необходимости
+        """
+        cached = _user_cache.get(user_id)
+        if cached is not None and time.time() < cached[1]:
+            return cached[0]
+
+        # Параллельные промахи по одному пользователю разделяют одну загрузку
+        # (и одно обновление токена)
+        return await _coalesce(
+            _user_loads, user_id, lambda: self._load_tracker_headers(user_id)
+        )
+
+    async def _load_tracker_headers(self, user_id: int) -> httpx.Headers | None:
+        """Загружает пользователя с текущим трекером, обновляя истёкший токен"""
+        async with self._db_lock:
+            # Пользователь и текущий трекер загружаются одним запросом
+            row = await self.user_repo.get_by_id_with_current_tracker(user_id)
+            if not row:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Пользователь не найден",
                 )
+            user, tracker = row
+            org_id = (
+                tracker.yandex_org_id or tracker.yandex_cloud_id if tracker else None
+            )
             if not user.yandex_token:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Токен Яндекс не привязан к учетной записи",
                 )
 
-            if self._is_token_expired(user.yandex_token_expires):
+            deadline = _token_deadline(user.yandex_token_expires)
+            if time.time() > deadline:
                 if not user.yandex_refresh_token:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="Отсутствует refresh token для обновления",
                     )
-                return await self._refresh_and_update_user_tokens(user)
-            return user
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка проверки токена пользователя: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при проверке токена",
+                # Объект мог попасть в сессию раньше, чем другой запрос
+                # обновил токен, поэтому перед обновлением перечитываем его
+                await self.db.refresh(
+                    user,
+                    [
+                        "yandex_token",
+                        "yandex_refresh_token",
+                        "yandex_token_expires",
+                    ],
+                )
+                deadline = _token_deadline(user.yandex_token_expires)
+                if time.time() > deadline:
+                    user = await self._refresh_and_update_user_tokens(user)
+                    deadline = _token_deadline(user.yandex_token_expires)
+            # Заголовки авторизации собираются один раз на загрузку
+            # пользователя (после возможного обновления токена). httpx.Headers
+            # хранит уже закодированные значения, и при слиянии с заголовками
+            # клиента они не нормализуются заново на каждый запрос
+            headers = (
+                httpx.Headers(
+                    {
+                        "Authorization": f"OAuth {user.yandex_token}",
+                        "X-Org-ID": org_id,
+                        "X-Cloud-Org-ID": org_id,
+                    }
+                )
+                if org_id
+                else None
             )
+            _user_cache[user_id] = (headers, deadline)
+            return headers
 
+    @translate_errors("Ошибка обновления токенов", "Ошибка при обновлении токенов")
     async def _refresh_and_update_user_tokens(self, user: User) -> User:
         """Обновляет токены пользователя"""
-        try:
-            new_tokens = await self._refresh_token(user.yandex_refresh_token)
-            return await self.user_repo.update_yandex_tokens(
-                user.id,
-                new_tokens.access_token,
-                new_tokens.refresh_token,
-                timedelta(seconds=new_tokens.expires_in),
-            )
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка обновления токенов: {str(e)}")
+        invalidate_cached_user(user.id)
+        new_tokens = await self._refresh_token(user.yandex_refresh_token)
+        return await self.user_repo.update_yandex_tokens(
+            user.id,
+            new_tokens.access_token,
+            new_tokens.refresh_token,
+            new_tokens.expires_in,
+        )
+
+    async def _refresh_token(self, refresh_token: str) -> YandexTokenResponse:
+        """Обновление истёкшего токена через Яндекс OAuth"""
+        return await YandexService(self.db, self.user_repo)._refresh_token(
+            refresh_token
+        )
+
+    async def _authed_call(
+        self,
+        user_id: int,
+        method: str,
+        url: str,
+        data: dict | None = None,
+        params: dict | None = None,
+        adapter: TypeAdapter | None = None,
+        idempotent: bool | None = None,
+    ):
+        """Запрос к API трекера от имени пользователя с проверкой токена и org_id"""
+        headers = await self._get_org_headers(user_id)
+        return await self._make_yandex_tracker_request(
+            method,
+            url,
+            headers,
+            data,
+            params=params,
+            adapter=adapter,
+            idempotent=idempotent,
+        )
+
+    async def _get_org_headers(self, user_id: int) -> httpx.Headers:
+        """Заголовки трекера пользователя; 400, если у трекера нет org_id"""
+        headers = await self._get_tracker_headers(user_id)
+        if headers is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при обновлении токенов",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Organization ID не установлен",
             )
+        return headers
 
-    async def get_users(self, user_id: int):
-        """Получение списка пользователей трекера"""
-        try:
-            user = await self._get_user_with_valid_token(user_id)
-            if not user.org_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Organization ID не установлен",
-                )
-            return await self._make_yandex_tracker_request(
-                "GET",
-                "https://api.tracker.yandex.net/v2/users",
-                user.yandex_token,
-                user.org_id,
-            )
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка получения пользователей: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при получении списка пользователей",
+    async def _cached_get(
+        self,
+        user_id: int,
+        url: str,
+        params: dict | None = None,
+        adapter: TypeAdapter | None = None,
+    ):
+        """
+        GET к API трекера через общий кэш ответов (см. _get_cache). Ответ
+        разделяется между вызывающими и не должен изменяться
+        """
+        headers = await self._get_org_headers(user_id)
+        key = (
+            url,
+            tuple(params.items()) if params else (),
+            headers["Authorization"],
+            headers["X-Org-ID"],
+        )
+        cached = _get_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < GET_CACHE_FRESH:
+            return cached[2]
+        return await _coalesce(
+            _get_loads,
+            key,
+            lambda: self._load_cached_get(key, url, headers, params, cached, adapter),
+        )
+
+    async def _load_cached_get(
+        self,
+        key: tuple,
+        url: str,
+        headers: httpx.Headers,
+        params: dict | None,
+        cached: tuple | None,
+        adapter: TypeAdapter | None,
+    ):
+        """Загружает или перепроверяет по ETag ответ GET и кладёт его в кэш"""
+        etag = cached[1] if cached is not None else None
+        if etag:
+            headers = headers.copy()
+            headers["If-None-Match"] = etag
+        response = await self._send_tracker_request("GET", url, headers, params=params)
+        if response.status_code == 304 and cached is not None:
+            payload = cached[2]
+            etag = response.headers.get("ETag", etag)
+        else:
+            payload = (
+                adapter.validate_json(response.content)
+                if adapter is not None
+                else from_json(response.content)
             )
+            etag = response.headers.get("ETag")
+        _get_cache[key] = (time.monotonic(), etag, payload)
+        return payload
 
+    @staticmethod
+    def _is_robot(tracker_user: dict) -> bool:
+        """Проверяет, является ли пользователь трекера роботом"""
+        return tracker_user.get("display", "").lower().startswith(
+            "робот"
+        ) or tracker_user.get("login", "").endswith("-robot")
+
+    @translate_errors(
+        "Ошибка получения пользователей", "Ошибка при получении списка пользователей"
+    )
+    async def get_users(self, user_id: int):
+        """Получение списка пользователей трекера (без роботов)"""
+        tracker_users = await self._cached_get(
+            user_id, URL_USERS, params={"fields": USER_FIELDS}
+        )
+        return [u for u in tracker_users if not self._is_robot(u)]
+
+    @translate_errors(
+        "Ошибка получения спринтов", "Ошибка при получении списка спринтов"
+    )
     async def get_sprints(self, user_id: int) -> list[Sprint]:
         """Получение списка спринтов трекера"""
-        try:
-            user = await self._get_user_with_valid_token(user_id)
-            if not user.org_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Organization ID не установлен",
-                )
-            sprints = await self._make_yandex_tracker_request(
-                "GET",
-                "https://api.tracker.yandex.net/v2/sprints",
-                user.yandex_token,
-                user.org_id,
-            )
-            log.debug(f"Received sprints: {sprints}")
-            return [
-                Sprint(
-                    id=sprint.get("id"),
-                    name=sprint.get("name"),
-                    board=sprint.get("board", {}).get("display"),
-                    start_date=sprint.get("startDate"),
-                    end_date=sprint.get("endDate"),
-                )
-                for sprint in sprints
-            ]
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка получения спринтов: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при получении списка спринтов",
-            )
+        # Спринты валидируются из байтов ответа один раз и кэшируются уже
+        # готовыми (неизменяемыми) объектами
+        sprints = await self._cached_get(
+            user_id, URL_SPRINTS, adapter=SPRINT_LIST_ADAPTER
+        )
+        log.debug("Received sprints: %s", sprints)
+        return list(sprints)
+
+    async def get_dashboard(self, user_id: int) -> dict:
+        """Спринты и пользователи трекера для стартового экрана одним вызовом"""
+        # Пользователь с токеном разрешается один раз до параллельных запросов:
+        # иначе оба запроса промахиваются мимо кэша и читают БД по очереди
+        await self._get_tracker_headers(user_id)
+        sprints, tracker_users = await asyncio.gather(
+            self.get_sprints(user_id),
+            self.get_users(user_id),
+        )
+        return {"sprints": sprints, "tracker_users": tracker_users}
 
     async def get_sprint_tasks(
         self, sprint_id: int, user_id: int, assignee_user_login: str
-    ) -> Task:
+    ) -> list[Task]:
         """Получение списка задач спринта"""
-        try:
-            user = await self._get_user_with_valid_token(user_id)
-            if not user.org_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Organization ID не установлен",
-                )
-            log.debug(
-                f"Getting tasks for sprint {sprint_id} assigned to user {assignee_user_login}"
+        return [
+            task
+            async for page in self.iter_sprint_tasks(
+                sprint_id, user_id, assignee_user_login
             )
-            return [
-                Task(**task)
-                for task in await self._make_yandex_tracker_request(
-                    "POST",
-                    "https://api.tracker.yandex.net/v3/issues/_search",
-                    user.yandex_token,
-                    user.org_id,
-                    {
-                        "filter": {
-                            "sprint": sprint_id,
-                            "assignee": assignee_user_login,
-                            "type": "task",
-                        },
+            for task in page
+        ]
+
+    @translate_errors(
+        "Ошибка получения задач спринта", "Ошибка при получении списка задач спринта"
+    )
+    async def iter_sprint_tasks(
+        self, sprint_id: int, user_id: int, assignee_user_login: str
+    ) -> AsyncIterator[list[Task]]:
+        """Постраничное получение задач спринта: страницы отдаются по мере загрузки"""
+        log.debug(
+            "Getting tasks for sprint %s assigned to user %s",
+            sprint_id,
+            assignee_user_login,
+        )
+        page = 1
+        while True:
+            tasks = await self._authed_call(
+                user_id,
+                "POST",
+                URL_ISSUES_SEARCH,
+                {
+                    "filter": {
+                        "sprint": sprint_id,
+                        "assignee": assignee_user_login,
+                        "type": "task",
                     },
-                )
-            ]
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка получения задач спринта: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при получении списка задач спринта",
+                },
+                params={
+                    "perPage": TASKS_PAGE_SIZE,
+                    "page": page,
+                    "fields": TASK_FIELDS,
+                },
+                adapter=TASK_LIST_ADAPTER,
+                # Поиск только читает данные: повтор при 502/504 безопасен
+                idempotent=True,
             )
+            if tasks:
+                yield tasks
+            if len(tasks) < TASKS_PAGE_SIZE:
+                break
+            page += 1
 
+    @translate_errors(
+        "Ошибка получения информации о спринте",
+        "Ошибка при получении информации о спринте",
+    )
     async def get_sprint(self, sprint_id: int, user_id: int) -> Sprint:
         """Получение информации о спринте"""
-        try:
-            user = await self._get_user_with_valid_token(user_id)
-            if not user.org_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Organization ID не установлен",
-                )
-            sprint = await self._make_yandex_tracker_request(
-                "GET",
-                f"https://api.tracker.yandex.net/v3/sprints/{sprint_id}",
-                user.yandex_token,
-                user.org_id,
-            )
-            return Sprint(
-                id=sprint.get("id"),
-                name=sprint.get("name", {}),
-                board=sprint.get("board").get("display"),
-                start_date=sprint.get("startDate"),
-                end_date=sprint.get("endDate"),
-            )
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка получения информации о спринте: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при получении информации о спринте",
-            )
+        return await self._authed_call(
+            user_id,
+            "GET",
+            URL_SPRINT(sprint_id),
+            adapter=SPRINT_ADAPTER,
+        )
 
+    @translate_errors(
+        "Ошибка получения информации о затраченном времени",
+        "Ошибка при получении информации о затраченном времени",
+    )
     async def get_issue_logged_time(self, issue_id: str, user_id: int) -> float:
         """Получение информации о затраченном времени на задачу"""
-        try:
-            user = await self._get_user_with_valid_token(user_id)
-            if not user.org_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Organization ID не установлен",
-                )
-            worklog_entries = await self._make_yandex_tracker_request(
-                "GET",
-                f"https://api.tracker.yandex.net/v3/issues/{issue_id}/worklog",
-                user.yandex_token,
-                user.org_id,
-            )
-
-            total_seconds = 0
-
-            for entry in worklog_entries:
-                duration = entry.get("duration", "")
-                if not duration:
-                    continue
-
-                try:
-                    duration_obj = parse_duration(duration)
-                    if hasattr(duration_obj, "total_seconds"):
-                        seconds = duration_obj.total_seconds()
-                    else:
-                        seconds = duration_obj.days * 24 * 3600 + duration_obj.seconds
-
-                    total_seconds += seconds
-                except ValueError:
-                    continue
-
-            total_hours = round(total_seconds / 3600, 1)
-            return total_hours
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка получения информации о затраченном времени: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при получении информации о затраченном времени",
-            )
+        worklog_entries = await self._authed_call(
+            user_id,
+            "GET",
+            URL_ISSUE_WORKLOG(issue_id),
+        )
 
-    def _is_token_expired(self, expires_at: datetime) -> bool:
-        """Проверяет истёк ли срок действия токена"""
-        return datetime.utcnow() > expires_at if expires_at else True
-
-    async def _refresh_and_update_user_tokens(self, user: User) -> User:
-        """Обновляет токены пользователя"""
-        try:
-            new_tokens = await self._refresh_token(user.yandex_refresh_token)
-            return await self.user_repo.update_yandex_tokens(
-                user.id,
-                new_tokens.access_token,
-                new_tokens.refresh_token,
-                timedelta(seconds=new_tokens.expires_in),
-            )
-        except HTTPException:
-            raise
-        except Exception as e:
-            log.error(f"Ошибка обновления токенов: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при обновлении токенов",
-            )
+        total_hours = sum(
+            duration_hours(entry["duration"])
+            for entry in worklog_entries
+            if entry.get("duration")
+        )
+        return round(total_hours, 1)
@@ -0,0 +1,53 @@
+import functools
+import inspect
+import logging
+
+from fastapi import HTTPException, status
+
+
+def translate_errors(
+    log_message: str,
+    detail: str,
+    exc_info: bool = False,
+    status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR,
+):
+    """
+    Декоратор для методов сервисов и эндпоинтов: HTTPException пробрасывается
+    как есть, любая другая ошибка логируется и превращается в status_code
+    (по умолчанию 500) с текстом detail.
+    Поддерживает как корутины, так и асинхронные генераторы.
+    """
+
+    def wrap(fn):
+        log = logging.getLogger(fn.__module__)
+
+        def translate(e: Exception) -> HTTPException:
+            log.error(f"{log_message}: {str(e)}", exc_info=exc_info)
+            return HTTPException(status_code=status_code, detail=detail)
+
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def gen_inner(*args, **kwargs):
+                try:
+                    async for item in fn(*args, **kwargs):
+                        yield item
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    raise translate(e)
+
+            return gen_inner
+
+        @functools.wraps(fn)
+        async def inner(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise translate(e)
+
+        return inner
+
+    return wrap
@@ -1,58 +1,50 @@
-from typing import List
+from itertools import islice
+from typing import Dict, List
 
 from ..schemas.task import Task
 
 
 # Функция для генерации промта на основе данных
 def generate_employee_analysis_prompt(tasks: List[Task]) -> str:
-    # Группируем задачи по сотрудникам
-    employees = {}
-
+    # Группируем задачи по сотрудникам (порядок — по первому появлению)
+    tasks_by_assignee: Dict[str, List[Task]] = {}
     for task in tasks:
-        if not task.assignee:
-            continue
-
-        assignee_name = task.assignee.get("display", "Неизвестный сотрудник")
-        if assignee_name not in employees:
-            employees[assignee_name] = {"completed": 0, "open": 0, "tasks": []}
-
-        task_info = {
-            "key": task.key,
-            "summary": task.summary,
-            "status": task.statusType.get("display", "unknown"),
-            "created": task.createdAt,
-            "resolved": task.resolvedAt if task.resolvedAt else None,
-        }
-
-        employees[assignee_name]["tasks"].append(task_info)
-
-        if task.statusType.get("key") == "done":
-            employees[assignee_name]["completed"] += 1
-        else:
-            employees[assignee_name]["open"] += 1
+        if task.assignee:
+            assignee_name = task.assignee.get("display", "Неизвестный сотрудник")
+            tasks_by_assignee.setdefault(assignee_name, []).append(task)
 
-    # Формируем промт
-    prompt = """
+    # Формируем промт: фрагменты собираются в список и склеиваются один раз
+    parts = [
+        """
     Ты — HR-аналитик. Проанализируй работу сотрудников на основе данных из Яндекс.Трекера.
     Вот статистика по задачам:
     """
-
-    for emp, data in employees.items():
-        prompt += f"\n\nСотрудник: {emp}\n"
-        prompt += f"- Всего задач: {len(data['tasks'])}\n"
-        prompt += f"- Завершено: {data['completed']}\n"
-        prompt += f"- В работе: {data['open']}\n"
-
-        # Примеры задач
-        prompt += "\nПоследние задачи:\n"
-        for task in data["tasks"][:3]:  # Берем первые 3 для примера
-            prompt += f"  * {task['key']}: {task['summary']} ({task['status']})\n"
-
-    prompt += """
+    ]
+
+    for emp, assignee_tasks in tasks_by_assignee.items():
+        completed = sum(
+            1 for task in assignee_tasks if task.statusType.get("key") == "done"
+        )
+        total = len(assignee_tasks)
+        parts.append(
+            f"\n\nСотрудник: {emp}\n"
+            f"- Всего задач: {total}\n"
+            f"- Завершено: {completed}\n"
+            f"- В работе: {total - completed}\n"
+            "\nПоследние задачи:\n"
+        )
+        # Примеры задач: берем первые 3
+        parts.extend(
+            f"  * {task.key}: {task.summary} "
+            f"({task.statusType.get('display', 'unknown')})\n"
+            for task in islice(assignee_tasks, 3)
+        )
+
+    parts.append("""
     \nДайте анализ:
     1. Общая продуктивность по каждому сотруднику.
     2. Проблемные места (например, долгие незавершенные задачи).
     3. Рекомендации по улучшению работы.
-    """
+    """)
 
-    return prompt
+    return "".join(parts)